@@ -5,8 +5,18 @@ import subprocess
 import re
 import os
 import sys
+import io
 import json
 import shutil
+import struct
+import threading
+import atexit
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+import time
+import zlib
 import psutil
 from datetime import datetime
 from flask import Flask, jsonify, render_template_string, request
@@ -40,6 +50,23 @@ def save_config(config):
     except IOError:
         return False
 
+_config_cache = {'mtime': None, 'config': None}
+
+def current_config():
+    """Return the config, re-reading the file only when its mtime changes.
+    
+    The returned dict is replaced (never mutated) on reload, so callers can
+    detect changes by identity.
+    """
+    try:
+        mtime = CONFIG_FILE.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    if _config_cache['config'] is None or mtime != _config_cache['mtime']:
+        _config_cache['config'] = load_config()
+        _config_cache['mtime'] = mtime
+    return _config_cache['config']
+
 def get_port():
     """Get port from config or command line."""
     # Command line arg takes precedence
@@ -523,6 +550,27 @@ HTML_TEMPLATE = '''
         }
         .process-meta .user { color: var(--accent-purple); }
         .process-meta .heap { color: var(--accent-orange); }
+        .process-meta .tree-toggle { color: var(--accent-cyan); cursor: pointer; }
+        .process-meta .tree-root { color: var(--text-secondary); }
+        .process-meta .daemon-state { color: var(--text-secondary); }
+
+        .tree-view {
+            padding: 0.25rem 0.75rem 0.5rem 4rem;
+            font-size: 10px;
+            color: var(--text-secondary);
+            border-bottom: 1px solid var(--border);
+        }
+        .tree-node { display: flex; gap: 1rem; white-space: nowrap; }
+        .tree-node .tree-name { flex: 1; overflow: hidden; text-overflow: ellipsis; }
+
+        .daemon-compat {
+            padding: 0 0.75rem;
+            font-size: 10px;
+            color: var(--text-secondary);
+        }
+        .daemon-compat:not(:empty) { padding: 0.5rem 0.75rem; }
+        .compat-version { color: var(--accent-orange); }
+        .compat-group { padding-left: 1rem; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; }
 
         .mem { color: var(--accent-orange); text-align: right; font-size: 11px; }
         .cpu { color: var(--accent-green); text-align: right; font-size: 11px; }
@@ -702,6 +750,7 @@ HTML_TEMPLATE = '''
             <span>RAM <span class="value" id="app-memory">-</span></span>
             <span>Up <span class="value" id="app-uptime">-</span></span>
             <span>PID <span class="value" id="app-pid">-</span></span>
+            <span>Sample <span class="value" id="app-interval">-</span></span>
         </div>
 
         <div class="section" id="section-gradle">
@@ -709,6 +758,7 @@ HTML_TEMPLATE = '''
                 <div class="section-title gradle"><span class="dot"></span>Gradle <span class="section-count" id="gradle-section-count">0</span></div>
             </div>
             <div class="process-table" id="gradle-list"></div>
+            <div class="daemon-compat" id="daemon-compat"></div>
         </div>
 
         <div class="section" id="section-kotlin">
@@ -746,6 +796,8 @@ HTML_TEMPLATE = '''
             <div class="process-table" id="java-list"></div>
         </div>
 
+        <div id="custom-sections"></div>
+
         <div class="actions">
             <button class="btn" onclick="refresh()">↻ Refresh</button>
             <button class="btn danger" onclick="stopAllDaemons()">⏹ Stop Daemons</button>
@@ -755,25 +807,21 @@ HTML_TEMPLATE = '''
     </div>
 
     <script>
-        // Thresholds for warnings
+        // Thresholds for row highlighting; replaced by the server's
+        // (config 'alerts') with every status payload
         const THRESHOLDS = {
             CPU_WARNING: 50,
             CPU_CRITICAL: 80,
-            CPU_STUCK: 85,           // CPU threshold for "stuck" detection
             MEM_WARNING: 1024 * 1024 * 1024,  // 1 GB
             MEM_CRITICAL: 2 * 1024 * 1024 * 1024,  // 2 GB
             TOTAL_MEM_WARNING: 4 * 1024 * 1024 * 1024,  // 4 GB
-            IDLE_DAEMON_MINUTES: 30, // Daemon idle for this long = zombie
-            STUCK_CHECK_COUNT: 6,    // Number of consecutive checks (6 * 5s = 30s)
         };
 
+        // Alerts are evaluated by the sampler; the page only mirrors them.
+        // A dismissed alert stays hidden until the server clears it.
         let alerts = new Map();
-        let cpuHistory = new Map();  // pid -> array of last N cpu readings
-
-        // Memory leak prevention
-        const MAX_ALERTS = 50;
-        const MAX_HISTORY_PIDS = 100;
-        const CLEANUP_INTERVAL = 60000; // 1 minute
+        let dismissedAlerts = new Set();
+        let expandedTrees = new Set();  // root pids whose subtree is shown
 
         // Theme
         function toggleTheme() {
@@ -796,54 +844,19 @@ HTML_TEMPLATE = '''
             return parseFloat((bytes / Math.pow(k, i)).toFixed(1)) + ' ' + sizes[i];
         }
 
-        function addAlert(id, type, message) {
-            // Update timestamp if exists (keeps it from being cleaned as stale)
-            if (alerts.has(id)) {
-                alerts.get(id).time = Date.now();
-                return;
-            }
-            
-            // Prevent unbounded growth - remove oldest if at limit
-            if (alerts.size >= MAX_ALERTS) {
-                const firstKey = alerts.keys().next().value;
-                alerts.delete(firstKey);
-            }
-            
-            alerts.set(id, { type, message, time: Date.now() });
-            renderAlerts();
+        // For config-supplied text (custom category labels and icons)
+        function escapeHtml(text) {
+            return String(text ?? '').replace(/[&<>"']/g, c => ({
+                '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+            })[c]);
         }
 
         function removeAlert(id) {
+            dismissedAlerts.add(id);
             alerts.delete(id);
             renderAlerts();
         }
 
-        // Periodic cleanup of stale data
-        function cleanupStaleData() {
-            const now = Date.now();
-            
-            // Remove alerts older than 5 minutes that weren't refreshed
-            for (const [id, alert] of alerts) {
-                if (now - alert.time > 300000) {
-                    alerts.delete(id);
-                }
-            }
-            
-            // Limit cpuHistory size
-            if (cpuHistory.size > MAX_HISTORY_PIDS) {
-                const entries = [...cpuHistory.entries()];
-                entries.slice(0, entries.length - MAX_HISTORY_PIDS).forEach(([pid]) => {
-                    cpuHistory.delete(pid);
-                });
-            }
-            
-            renderAlerts();
-            console.log(`[Gradik] Cleanup: ${alerts.size} alerts, ${cpuHistory.size} tracked PIDs`);
-        }
-
-        // Run cleanup every minute
-        setInterval(cleanupStaleData, CLEANUP_INTERVAL);
-
         function renderAlerts() {
             const wrapper = document.getElementById('alerts-container');
             const container = document.getElementById('alerts');
@@ -869,100 +882,31 @@ HTML_TEMPLATE = '''
             });
         }
 
-        function parseUptime(uptimeStr) {
-            // Parse uptime string like "5m 30s", "2h 15m", "1d 3h" to minutes
-            let minutes = 0;
-            const days = uptimeStr.match(/(\d+)d/);
-            const hours = uptimeStr.match(/(\d+)h/);
-            const mins = uptimeStr.match(/(\d+)m/);
-            if (days) minutes += parseInt(days[1]) * 24 * 60;
-            if (hours) minutes += parseInt(hours[1]) * 60;
-            if (mins) minutes += parseInt(mins[1]);
-            return minutes;
-        }
-
-        function checkStuckProcess(proc) {
-            const pid = proc.pid;
-            
-            // Track CPU history
-            if (!cpuHistory.has(pid)) cpuHistory.set(pid, []);
-            const history = cpuHistory.get(pid);
-            history.push(proc.cpu);
-            if (history.length > THRESHOLDS.STUCK_CHECK_COUNT) history.shift();
-            
-            // Check for stuck (high CPU for extended period)
-            if (history.length >= THRESHOLDS.STUCK_CHECK_COUNT) {
-                const allHigh = history.every(cpu => cpu > THRESHOLDS.CPU_STUCK);
-                if (allHigh) {
-                    addAlert(`stuck-${pid}`, 'danger', `🔄 STUCK? ${proc.name} (PID ${pid}) - High CPU for 30s+`);
-                    return 'stuck';
-                }
-            }
-            removeAlert(`stuck-${pid}`);
-            
-            // Check for idle daemon (only for Gradle/Kotlin daemons)
-            if (proc.name.includes('Daemon')) {
-                const uptimeMinutes = parseUptime(proc.uptime || '0m');
-                if (uptimeMinutes > THRESHOLDS.IDLE_DAEMON_MINUTES && proc.cpu < 1 && proc.memory < 100 * 1024 * 1024) {
-                    addAlert(`idle-${pid}`, 'warning', `💤 IDLE: ${proc.name} (PID ${pid}) - ${proc.uptime} with no activity`);
-                    return 'idle';
-                }
-            }
-            removeAlert(`idle-${pid}`);
-            
-            return null;
-        }
-
         function checkAlerts(data) {
-            // Check total memory
-            if (data.total_memory > THRESHOLDS.TOTAL_MEM_WARNING) {
-                addAlert('total-mem', 'warning', `High total memory: ${formatBytes(data.total_memory)}`);
-            } else {
-                removeAlert('total-mem');
+            if (data.thresholds) {
+                Object.entries(data.thresholds).forEach(([key, value]) => {
+                    THRESHOLDS[key.toUpperCase()] = value;
+                });
             }
 
-            // Track seen PIDs to clean up old history
-            const seenPids = new Set();
-
-            // Check individual processes
-            const allProcs = [...data.gradle, ...data.kotlin, ...data.studio, ...data.emulator, ...data.ide, ...data.java];
-            allProcs.forEach(proc => {
-                seenPids.add(proc.pid);
-                
-                // Check for stuck/idle processes
-                const stuckStatus = checkStuckProcess(proc);
-                proc._status = stuckStatus;  // Attach status for rendering
-                
-                // Standard CPU/memory alerts (skip if already marked as stuck)
-                if (stuckStatus !== 'stuck') {
-                    if (proc.cpu > THRESHOLDS.CPU_CRITICAL) {
-                        addAlert(`cpu-${proc.pid}`, 'danger', `${proc.name} (PID ${proc.pid}) CPU: ${proc.cpu.toFixed(1)}%`);
-                    } else if (proc.cpu > THRESHOLDS.CPU_WARNING) {
-                        addAlert(`cpu-${proc.pid}`, 'warning', `${proc.name} (PID ${proc.pid}) CPU: ${proc.cpu.toFixed(1)}%`);
-                    } else {
-                        removeAlert(`cpu-${proc.pid}`);
-                    }
-                }
+            const serverAlerts = data.alerts || [];
+            const active = new Set(serverAlerts.map(alert => alert.id));
+            for (const id of [...dismissedAlerts]) {
+                if (!active.has(id)) dismissedAlerts.delete(id);
+            }
+            alerts = new Map(serverAlerts
+                .filter(alert => !dismissedAlerts.has(alert.id))
+                .map(alert => [alert.id, { type: alert.level, message: alert.message }]));
+            renderAlerts();
 
-                if (proc.memory > THRESHOLDS.MEM_CRITICAL) {
-                    addAlert(`mem-${proc.pid}`, 'danger', `${proc.name} (PID ${proc.pid}) RAM: ${formatBytes(proc.memory)}`);
-                } else if (proc.memory > THRESHOLDS.MEM_WARNING) {
-                    addAlert(`mem-${proc.pid}`, 'warning', `${proc.name} (PID ${proc.pid}) RAM: ${formatBytes(proc.memory)}`);
-                } else {
-                    removeAlert(`mem-${proc.pid}`);
-                }
+            // Stuck / idle badges for the process rows
+            const statuses = new Map();
+            serverAlerts.forEach(alert => {
+                if (alert.kind === 'stuck' || alert.kind === 'idle') statuses.set(alert.pid, alert.kind);
+            });
+            data.categories.flatMap(cat => data[cat.id] || []).forEach(proc => {
+                proc._status = statuses.get(proc.pid) || null;
             });
-
-            // Clean up history for dead processes
-            for (const pid of cpuHistory.keys()) {
-                if (!seenPids.has(pid)) {
-                    cpuHistory.delete(pid);
-                    removeAlert(`stuck-${pid}`);
-                    removeAlert(`idle-${pid}`);
-                    removeAlert(`cpu-${pid}`);
-                    removeAlert(`mem-${pid}`);
-                }
-            }
             
             // Self-check: warn if Gradik is using too much memory (>100MB)
             if (data.app && data.app.memory > 100 * 1024 * 1024) {
@@ -1004,10 +948,26 @@ HTML_TEMPLATE = '''
                 } else if (status === 'idle') {
                     statusBadge = '<span class="status-badge idle">IDLE</span>';
                     rowClass = 'warning';
+                } else if (proc.kotlin_daemon && proc.kotlin_daemon.orphan) {
+                    statusBadge = '<span class="status-badge idle">ORPHAN</span>';
+                    rowClass = 'warning';
                 }
                 
-                const heap = proc.heap ? `<span class="heap">${proc.heap}</span>` : '';
-                const meta = `<span class="user">${proc.user}</span> · ${proc.uptime} ${heap}`;
+                let heap = proc.heap ? `<span class="heap">${proc.heap}</span>` : '';
+                if (proc.jvm) {
+                    heap = `<span class="heap" title="committed ${formatBytes(proc.jvm.heap_committed)} · ${proc.jvm.gc_count} GCs, ${proc.jvm.gc_time}s total">heap ${formatBytes(proc.jvm.heap_used)}/${formatBytes(proc.jvm.heap_max)}</span> · GC ${proc.jvm.gc_rate.toFixed(1)}%`;
+                }
+                let tree = '';
+                if (proc.tree) {
+                    tree = ` · <span class="tree-toggle" onclick="toggleTree(${proc.pid})">${expandedTrees.has(proc.pid) ? '▾' : '▸'} +${proc.tree.descendants} procs, ${formatBytes(proc.tree.memory)} · ${proc.tree.cpu.toFixed(1)}%</span>`;
+                } else if (proc.root) {
+                    tree = ` · <span class="tree-root">↳ ${proc.root}</span>`;
+                }
+                let state = proc.daemon ? ` · <span class="daemon-state">${proc.daemon.state}</span>` : '';
+                if (proc.kotlin_daemon && proc.kotlin_daemon.clients.length) {
+                    state = ` · <span class="daemon-state">serves ${proc.kotlin_daemon.clients.join(', ')}</span>`;
+                }
+                const meta = `<span class="user">${proc.user}</span> · ${proc.uptime}${state} ${heap}${tree}`;
                 
                 html += `
                     <div class="process-row ${rowClass}">
@@ -1017,15 +977,104 @@ HTML_TEMPLATE = '''
                             <div class="process-meta">${meta}</div>
                         </div>
                         <div class="mem ${memClass}">${formatBytes(proc.memory)}</div>
-                        <div class="cpu ${cpuClass}">${proc.cpu.toFixed(1)}%</div>
+                        <div class="cpu ${cpuClass}" title="user ${proc.cpu_user}% · sys ${proc.cpu_system}% · ${proc.cpu_norm}% of machine">${proc.cpu.toFixed(1)}%</div>
                         <button class="kill-btn" onclick="killProcess(${proc.pid}, '${proc.name.replace(/'/g, "\\'")}')">×</button>
                     </div>
                 `;
+                if (proc.tree && expandedTrees.has(proc.pid)) {
+                    html += `<div class="tree-view" id="tree-${proc.pid}">Loading…</div>`;
+                }
             });
 
             container.innerHTML = html;
         }
 
+        function renderTreeNodes(node, depth) {
+            let html = `
+                <div class="tree-node">
+                    <span class="tree-name" style="padding-left: ${depth}rem">${depth ? '└ ' : ''}${escapeHtml(node.name)} <span class="pid">${node.pid}</span></span>
+                    <span class="mem">${formatBytes(node.memory)}</span>
+                    <span class="cpu">${node.cpu.toFixed(1)}%</span>
+                </div>
+            `;
+            node.children.forEach(child => { html += renderTreeNodes(child, depth + 1); });
+            return html;
+        }
+
+        async function loadExpandedTrees() {
+            for (const pid of expandedTrees) {
+                const el = document.getElementById(`tree-${pid}`);
+                if (!el) {
+                    expandedTrees.delete(pid);
+                    continue;
+                }
+                try {
+                    const res = await fetch('/api/tree/' + pid);
+                    const data = await res.json();
+                    el.innerHTML = data.success ? renderTreeNodes(data.tree, 0) : 'Process tree unavailable';
+                } catch (err) {
+                    el.textContent = 'Failed to load process tree';
+                }
+            }
+        }
+
+        function toggleTree(pid) {
+            if (expandedTrees.has(pid)) expandedTrees.delete(pid);
+            else expandedTrees.add(pid);
+            refresh();
+        }
+
+        // Why several daemons of one Gradle version are alive
+        async function loadDaemonCompat(data) {
+            const panel = document.getElementById('daemon-compat');
+            const perVersion = {};
+            data.gradle.filter(p => p.compat).forEach(p => perVersion[p.name] = (perVersion[p.name] || 0) + 1);
+            if (!Object.values(perVersion).some(n => n > 1)) {
+                panel.innerHTML = '';
+                return;
+            }
+            try {
+                const res = await fetch('/api/daemons');
+                const result = await res.json();
+                if (!result.success) return;
+                panel.innerHTML = result.versions.filter(v => v.daemons > 1).map(v => {
+                    const groups = v.groups.map(g => {
+                        let reason = g.pids.length > 1 ? `same args, started while busy (+${g.pids.length - 1})` : 'first daemon';
+                        if (!g.baseline) {
+                            const parts = g.changes.map(c => `${c.from || '∅'} → ${c.to || '∅'}`);
+                            if (g.java_home_changed) parts.unshift(`Java ${g.java_home}`);
+                            reason = parts.join(', ') || 'different args';
+                        }
+                        // Args and paths come from command lines
+                        reason = escapeHtml(reason);
+                        return `<div class="compat-group" title="${reason}">PID ${g.pids.join(', ')} · ${formatBytes(g.memory)} · ${reason}</div>`;
+                    }).join('');
+                    return `<div class="compat-version">GradleDaemon ${escapeHtml(v.version)} ×${v.daemons} · extra daemons cost ${formatBytes(v.duplicate_memory)}</div>${groups}`;
+                }).join('');
+            } catch (err) {
+                panel.textContent = 'Failed to load daemon compatibility';
+            }
+        }
+
+        // Sections for user-defined categories from ~/.gradik/config.json
+        function renderCustomSections(data) {
+            const wrapper = document.getElementById('custom-sections');
+            const custom = data.categories.filter(cat => !cat.builtin);
+            const ids = custom.map(cat => cat.id).join(',');
+            if (wrapper.dataset.ids !== ids) {
+                wrapper.dataset.ids = ids;
+                wrapper.innerHTML = custom.map(cat => `
+                    <div class="section" id="section-${cat.id}">
+                        <div class="section-header">
+                            <div class="section-title java"><span class="dot"></span>${escapeHtml(cat.icon)} ${escapeHtml(cat.label)} <span class="section-count" id="${cat.id}-section-count">0</span></div>
+                        </div>
+                        <div class="process-table" id="${cat.id}-list"></div>
+                    </div>
+                `).join('');
+            }
+            custom.forEach(cat => renderProcessList(`${cat.id}-list`, data[cat.id] || [], `${cat.id}-section-count`));
+        }
+
         function updateStatCard(id, value, threshold = null) {
             const el = document.getElementById(id);
             el.classList.remove('warning', 'danger');
@@ -1053,6 +1102,9 @@ HTML_TEMPLATE = '''
                 document.getElementById('app-memory').textContent = formatBytes(data.app.memory);
                 document.getElementById('app-uptime').textContent = data.app.uptime;
                 document.getElementById('app-pid').textContent = data.app.pid;
+                if (data.sampler) {
+                    document.getElementById('app-interval').textContent = data.sampler.interval + 's' + (data.sampler.active ? ' ⚡' : '');
+                }
 
                 // Check for high consumption alerts
                 checkAlerts(data);
@@ -1067,6 +1119,9 @@ HTML_TEMPLATE = '''
                 renderProcessList('emulator-list', data.emulator, 'emulator-section-count');
                 renderProcessList('ide-list', data.ide, 'ide-section-count');
                 renderProcessList('java-list', data.java, 'java-section-count');
+                renderCustomSections(data);
+                loadExpandedTrees();
+                loadDaemonCompat(data);
 
             } catch (err) {
                 console.error('Failed to fetch status:', err);
@@ -1185,345 +1240,3564 @@ def format_uptime(seconds):
         return f"{days}d {hours}h"
 
 
-def get_all_processes():
-    """Get all relevant processes using psutil for richer info."""
-    processes = {
-        'gradle': [], 
-        'kotlin': [], 
-        'studio': [],
-        'emulator': [],
-        'ide': [],
-        'java': []
-    }
+def format_bytes(size):
+    """Human readable size, as formatBytes() in the page shows it."""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{round(size, 1):g} {unit}"
+        size /= 1024
+    return f"{round(size, 1):g} GB"
+
+
+# Built-in categories, in display order
+BUILTIN_CATEGORIES = {
+    'gradle': {'label': 'Gradle', 'icon': '⚙'},
+    'kotlin': {'label': 'Kotlin', 'icon': 'K'},
+    'studio': {'label': 'Android Studio', 'icon': '📱'},
+    'emulator': {'label': 'Emulators', 'icon': '📟'},
+    'ide': {'label': 'IDEs', 'icon': '📝'},
+    'java': {'label': 'Other Java', 'icon': '☕'},
+}
+
+# Classification rules. Predicates are lists of alternatives (OR); each
+# alternative is a tuple of terms that must all hold (AND). A term is
+# 'field:literal', prefixed with '!' for negation. Fields:
+#   cmd  - cmdline, case-sensitive
+#   cmdi - lowercased cmdline (literal must be lowercase)
+#   name - lowercased process name (literal must be lowercase)
+IS_JAVA = [('cmdi:java',)]
+IS_KOTLIN = [('cmdi:kotlin',)]
+IS_GRADLE = [('cmdi:gradle',)]
+IS_STUDIO = [('cmdi:android studio',), ('cmd:Android Studio.app',),
+             ('cmdi:com.google.android.studio',), ('cmd:-Didea.platform.prefix=AndroidStudio',)]
+IS_EMULATOR = [('name:qemu-system',), ('name:emulator',), ('name:emulator64',),
+               ('name:qemu',), ('cmd:Android Emulator',)]
+IS_ADB = [('name:adb', 'cmdi:server')]
+IS_IDE = [('name:cursor',), ('cmd:Cursor.app',),
+          ('name:code',), ('cmd:Code.app',), ('cmd:Visual Studio Code',),  # VS Code
+          ('name:windsurf',), ('cmd:Windsurf.app',),
+          ('name:trae',), ('cmd:Trae.app',),
+          ('name:antigravity',),
+          ('name:zed',), ('cmd:Zed.app',),
+          ('name:fleet',), ('cmd:Fleet.app',),
+          ('name:sublime',), ('cmd:Sublime',),
+          ('name:atom',), ('name:notepad++',),
+          ('name:neovim',), ('name:nvim',)]
+
+# A process is tracked at all only if it matches one of these
+RELEVANT = IS_JAVA + IS_KOTLIN + IS_GRADLE + IS_STUDIO + IS_EMULATOR + IS_ADB + IS_IDE
+
+# Ordered rules - the first match wins, so specific daemon types come
+# before generic IDE detection. 'names' is an ordered list of
+# (template, predicate, extractor): the first entry whose predicate holds
+# (None = always) and whose extractor (field, regex) matches, if given, is
+# used, with the regex groups formatted into the template.
+PROCESS_RULES = [
+    {'category': 'gradle', 'when': [('cmd:GradleDaemon',)], 'names': [
+        ('GradleDaemon {0}', None, ('cmd', r'GradleDaemon\s+(\d+\.\d+)')),
+        ('GradleDaemon', None, None)]},
+    {'category': 'kotlin', 'when': [('cmd:KotlinCompileDaemon',)], 'names': [
+        ('KotlinCompileDaemon', None, None)]},
+    {'category': 'kotlin', 'when': [('cmdi:kotlin-daemon',), ('cmdi:kotlin.daemon',)], 'names': [
+        ('Kotlin Daemon', None, None)]},
+    {'category': 'emulator', 'when': IS_EMULATOR, 'names': [
+        ('Emulator: {0}', None, ('cmd', r'-avd\s+([^\s]+)')),
+        ('QEMU (Android Emulator)', [('name:qemu-system',)], None),
+        ('Android Emulator', None, None)]},
+    {'category': 'studio', 'when': IS_ADB, 'names': [
+        ('ADB Server', None, None)]},
+    {'category': 'studio', 'when': [('cmd:-Didea.platform.prefix=AndroidStudio',), ('cmd:Android Studio.app',)], 'names': [
+        ('Android Studio {0}', None, ('cmdi', r'android-studio[/-](\d+\.\d+)')),
+        ('Android Studio', None, None)]},
+    {'category': 'studio', 'when': [('name:fsnotifier',)], 'names': [
+        ('Studio File Watcher', None, None)]},
+    {'category': 'studio', 'when': [('name:jcef_helper',), ('cmdi:jcef',)], 'names': [
+        ('Studio Browser Helper', None, None)]},
+    {'category': 'ide', 'when': IS_IDE, 'names': [
+        ('Cursor', [('name:cursor',), ('cmd:Cursor',)], None),
+        ('Windsurf', [('name:windsurf',), ('cmd:Windsurf',)], None),
+        ('VS Code', [('name:code',), ('cmd:Code.app',), ('cmd:Visual Studio Code',)], None),
+        ('Trae', [('name:trae',), ('cmd:Trae',)], None),
+        ('Antigravity', [('name:antigravity',)], None),
+        ('Zed', [('name:zed',), ('cmd:Zed',)], None),
+        ('Fleet', [('name:fleet',), ('cmd:Fleet',)], None),
+        ('Sublime Text', [('name:sublime',), ('cmd:Sublime',)], None),
+        ('Neovim', [('name:nvim',), ('name:neovim',)], None),
+        ('IDE', None, None)]},
+    {'category': 'gradle', 'when': [('cmd:GradleWorkerMain',)], 'names': [
+        ('Gradle Test Executor {0}', None, ('cmd', r'Gradle Test Executor (\d+)')),
+        ('Gradle Worker', None, None)]},
+    {'category': 'gradle', 'when': [('cmdi:gradle', '!cmdi:kotlin')], 'names': [
+        ('Gradle Process', None, None)]},
+    {'category': 'kotlin', 'when': IS_KOTLIN, 'names': [
+        ('Kotlin Process', None, None)]},
+]
+
+# Heap size from JVM args, extracted for every relevant process
+HEAP_EXTRACTOR = ('cmd', r'-Xmx(\d+[mgMG])')
+
+
+class RuleMatcher:
+    """Rule table compiled once into per-field literal tuples and regexes.
     
-    try:
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'username', 'cpu_percent', 
-                                          'memory_info', 'create_time', 'cwd']):
-            try:
-                pinfo = proc.info
-                proc_name = pinfo['name'] or ''
-                cmdline = ' '.join(pinfo['cmdline'] or [])
-                cmdline_lower = cmdline.lower()
-                proc_name_lower = proc_name.lower()
-                
-                # Check if it's a relevant process
-                is_java = 'java' in cmdline_lower
-                is_kotlin = 'kotlin' in cmdline_lower
-                is_gradle = 'gradle' in cmdline_lower
-                is_studio = ('android studio' in cmdline_lower or 
-                            'Android Studio.app' in cmdline or
-                            'com.google.android.studio' in cmdline_lower or
-                            '-Didea.platform.prefix=AndroidStudio' in cmdline)
-                is_emulator = ('qemu-system' in proc_name_lower or 
-                              'emulator' in proc_name_lower or
-                              'emulator64' in proc_name_lower or
-                              'qemu' in proc_name_lower or
-                              'Android Emulator' in cmdline)
-                is_adb = 'adb' in proc_name_lower and 'server' in cmdline_lower
-                
-                # IDE detection
-                is_ide = ('cursor' in proc_name_lower or
-                         'Cursor.app' in cmdline or
-                         'code' in proc_name_lower or  # VS Code
-                         'Code.app' in cmdline or
-                         'Visual Studio Code' in cmdline or
-                         'windsurf' in proc_name_lower or
-                         'Windsurf.app' in cmdline or
-                         'trae' in proc_name_lower or
-                         'Trae.app' in cmdline or
-                         'antigravity' in proc_name_lower or
-                         'zed' in proc_name_lower or
-                         'Zed.app' in cmdline or
-                         'fleet' in proc_name_lower or
-                         'Fleet.app' in cmdline or
-                         'sublime' in proc_name_lower or
-                         'Sublime' in cmdline or
-                         'atom' in proc_name_lower or
-                         'notepad++' in proc_name_lower or
-                         'neovim' in proc_name_lower or
-                         'nvim' in proc_name_lower)
-                
-                if not any([is_java, is_kotlin, is_gradle, is_studio, is_emulator, is_adb, is_ide]):
-                    continue
-                
-                pid = pinfo['pid']
-                cpu = pinfo['cpu_percent'] or 0
-                memory = pinfo['memory_info'].rss if pinfo['memory_info'] else 0
-                username = pinfo['username'] or 'unknown'
-                
-                # Calculate uptime
-                create_time = pinfo['create_time']
-                uptime_seconds = datetime.now().timestamp() - create_time if create_time else 0
-                uptime = format_uptime(uptime_seconds)
-                
-                # Get working directory
-                try:
-                    cwd = pinfo['cwd'] or ''
-                    home = os.path.expanduser('~')
-                    if cwd.startswith(home):
-                        cwd = '~' + cwd[len(home):]
-                except:
-                    cwd = ''
-                
-                # Simplify process name & extract extra info
-                name = cmdline[:100]
-                heap_size = ''
-                extra_info = ''
-                
-                # Extract heap size from JVM args
-                heap_match = re.search(r'-Xmx(\d+[mgMG])', cmdline)
-                if heap_match:
-                    heap_size = heap_match.group(1).upper()
-                
-                # Determine category and name - ORDER MATTERS!
-                # Check specific daemon types FIRST before generic IDE detection
-                category = 'java'
-                
-                if 'GradleDaemon' in cmdline:
-                    # This is a Gradle Daemon - highest priority
-                    category = 'gradle'
-                    name = 'GradleDaemon'
-                    version_match = re.search(r'GradleDaemon\s+(\d+\.\d+)', cmdline)
-                    if version_match:
-                        name = f'GradleDaemon {version_match.group(1)}'
-                elif 'KotlinCompileDaemon' in cmdline:
-                    # This is a Kotlin Compile Daemon
-                    category = 'kotlin'
-                    name = 'KotlinCompileDaemon'
-                elif 'kotlin-daemon' in cmdline_lower or 'kotlin.daemon' in cmdline_lower:
-                    category = 'kotlin'
-                    name = 'Kotlin Daemon'
-                elif is_emulator:
-                    category = 'emulator'
-                    # Try to extract AVD name
-                    avd_match = re.search(r'-avd\s+([^\s]+)', cmdline)
-                    if avd_match:
-                        name = f'Emulator: {avd_match.group(1)}'
-                    elif 'qemu-system' in proc_name_lower:
-                        name = 'QEMU (Android Emulator)'
-                    else:
-                        name = 'Android Emulator'
-                elif is_adb:
-                    category = 'studio'
-                    name = 'ADB Server'
-                elif '-Didea.platform.prefix=AndroidStudio' in cmdline or 'Android Studio.app' in cmdline:
-                    # Main Android Studio process
-                    category = 'studio'
-                    name = 'Android Studio'
-                    version_match = re.search(r'android-studio[/-](\d+\.\d+)', cmdline_lower)
-                    if version_match:
-                        name = f'Android Studio {version_match.group(1)}'
-                elif 'fsnotifier' in proc_name_lower:
-                    category = 'studio'
-                    name = 'Studio File Watcher'
-                elif 'jcef_helper' in proc_name_lower or 'jcef' in cmdline_lower:
-                    category = 'studio'
-                    name = 'Studio Browser Helper'
-                elif is_ide:
-                    category = 'ide'
-                    # Detect specific IDE
-                    if 'cursor' in proc_name_lower or 'Cursor' in cmdline:
-                        name = 'Cursor'
-                    elif 'windsurf' in proc_name_lower or 'Windsurf' in cmdline:
-                        name = 'Windsurf'
-                    elif 'code' in proc_name_lower or 'Code.app' in cmdline or 'Visual Studio Code' in cmdline:
-                        name = 'VS Code'
-                    elif 'trae' in proc_name_lower or 'Trae' in cmdline:
-                        name = 'Trae'
-                    elif 'antigravity' in proc_name_lower:
-                        name = 'Antigravity'
-                    elif 'zed' in proc_name_lower or 'Zed' in cmdline:
-                        name = 'Zed'
-                    elif 'fleet' in proc_name_lower or 'Fleet' in cmdline:
-                        name = 'Fleet'
-                    elif 'sublime' in proc_name_lower or 'Sublime' in cmdline:
-                        name = 'Sublime Text'
-                    elif 'nvim' in proc_name_lower or 'neovim' in proc_name_lower:
-                        name = 'Neovim'
-                    else:
-                        name = 'IDE'
-                elif is_gradle and not is_kotlin:
-                    category = 'gradle'
-                    name = 'Gradle Process'
-                elif is_kotlin:
-                    category = 'kotlin'
-                    name = 'Kotlin Process'
-                
-                proc_info = {
-                    'pid': pid,
-                    'name': name,
-                    'memory': memory,
-                    'cpu': cpu,
-                    'user': username,
-                    'uptime': uptime,
-                    'cwd': cwd,
-                    'heap': heap_size
-                }
-                
-                processes[category].append(proc_info)
-                    
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                pass
-                
-    except Exception as e:
-        print(f"Error getting processes: {e}")
+    Single-literal alternatives of a predicate are deduplicated and grouped
+    per field, shortest text first, so the common OR-of-substrings case is
+    a tight loop of `in` tests; only AND / negated alternatives take the
+    general path. Name and version extractors are precompiled.
+    """
     
-    return processes
-
-
-def get_app_stats():
-    """Get Gradik app's own resource usage."""
-    try:
-        proc = psutil.Process(APP_PID)
-        cpu = proc.cpu_percent(interval=0.1)
-        memory = proc.memory_info().rss
-        uptime_seconds = (datetime.now() - APP_START_TIME).total_seconds()
+    FIELDS = ('name', 'cmdi', 'cmd')  # cheapest text first
+    
+    def __init__(self, rules, relevant=RELEVANT, categories=None):
+        self.rules = rules
+        self.categories = categories or {c: BUILTIN_CATEGORIES[c] for c in BUILTIN_CATEGORIES}
+        self._relevant = self._compile_predicate(relevant)
+        self._compiled = []
+        for rule in rules:
+            names = [(template,
+                      self._compile_predicate(predicate) if predicate else None,
+                      (extractor[0], re.compile(extractor[1])) if extractor else None)
+                     for template, predicate, extractor in rule['names']]
+            self._compiled.append((rule['category'], self._compile_predicate(rule['when']), names))
+        self._heap = (HEAP_EXTRACTOR[0], re.compile(HEAP_EXTRACTOR[1]))
+    
+    def _compile_predicate(self, predicate):
+        singles = {field: [] for field in self.FIELDS}
+        compound = []
+        for alternative in predicate:
+            required, excluded = [], []
+            for term in alternative:
+                negate = term.startswith('!')
+                field, literal = term.lstrip('!').split(':', 1)
+                if field not in self.FIELDS:
+                    raise ValueError(f"Unknown field '{field}' in rule term '{term}'")
+                (excluded if negate else required).append((field, literal))
+            if len(required) == 1 and not excluded:
+                field, literal = required[0]
+                if literal not in singles[field]:
+                    singles[field].append(literal)
+            else:
+                compound.append((tuple(required), tuple(excluded)))
+        singles = tuple((field, tuple(literals)) for field, literals in singles.items() if literals)
+        return singles, tuple(compound)
+    
+    @staticmethod
+    def _holds(predicate, texts):
+        singles, compound = predicate
+        for field, literals in singles:
+            text = texts[field]
+            for literal in literals:
+                if literal in text:
+                    return True
+        for required, excluded in compound:
+            if (all(literal in texts[field] for field, literal in required) and
+                    not any(literal in texts[field] for field, literal in excluded)):
+                return True
+        return False
+    
+    def classify(self, proc_name, cmdline):
+        """Return (category, name, heap) or None if the process is not relevant."""
+        texts = {'cmd': cmdline, 'cmdi': cmdline.lower(), 'name': proc_name.lower()}
+        holds = self._holds
         
-        return {
-            'pid': APP_PID,
-            'cpu': round(cpu, 1),
-            'memory': memory,
-            'uptime': format_uptime(uptime_seconds)
-        }
-    except:
-        return {
-            'pid': APP_PID,
-            'cpu': 0,
-            'memory': 0,
-            'uptime': '0s'
-        }
+        if not holds(self._relevant, texts):
+            return None
+        
+        heap_size = ''
+        heap_match = self._heap[1].search(texts[self._heap[0]])
+        if heap_match:
+            heap_size = heap_match.group(1).upper()
+        
+        for category, when, names in self._compiled:
+            if not holds(when, texts):
+                continue
+            for template, predicate, extractor in names:
+                if predicate and not holds(predicate, texts):
+                    continue
+                if extractor:
+                    match = extractor[1].search(texts[extractor[0]])
+                    if not match:
+                        continue
+                    return category, template.format(*match.groups()), heap_size
+                return category, template, heap_size
+            break
+        
+        return 'java', cmdline[:100], heap_size
 
 
-@app.route('/')
-def index():
-    return render_template_string(HTML_TEMPLATE)
+_rule_matcher = RuleMatcher(PROCESS_RULES)
+_rule_matcher_source = None
 
+RESERVED_CATEGORY_IDS = {'total_memory', 'app', 'scan', 'sampler', 'timestamp', 'seq', 'age', 'categories',
+                         'alerts', 'thresholds', 'at'}
 
-@app.route('/api/status')
-def status():
-    processes = get_all_processes()
-    app_stats = get_app_stats()
+
+def compile_user_rules(config):
+    """Build a RuleMatcher from the built-in rules plus user rules in config.
     
-    all_procs = (processes['gradle'] + processes['kotlin'] + 
-                 processes['studio'] + processes['emulator'] + 
-                 processes['ide'] + processes['java'])
-    total_memory = sum(p['memory'] for p in all_procs)
+    Config format:
+        "categories": {"bazel": {"label": "Bazel"}},
+        "rules": [{"category": "bazel", "name": "Bazel Bridge",
+                   "match": ["cmd:BazelBridge", ["cmdi:buck", "cmdi:daemon"]],
+                   "version": "BazelBridge\\s+(\\S+)"}]
     
-    return jsonify({
-        'gradle': processes['gradle'],
-        'kotlin': processes['kotlin'],
-        'studio': processes['studio'],
-        'emulator': processes['emulator'],
-        'ide': processes['ide'],
-        'java': processes['java'],
-        'total_memory': total_memory,
-        'app': app_stats,
-        'timestamp': datetime.now().isoformat()
-    })
-
-
-@app.route('/api/kill/<int:pid>', methods=['POST'])
-def kill_process(pid):
-    """Kill a specific process by PID."""
-    import signal
-    import os
+    'match' is a list of alternatives; each is a term or a list of terms that
+    must all hold (see the predicate notes above PROCESS_RULES). User rules
+    are checked before the built-in ones. Invalid entries are skipped.
+    """
+    categories = {c: BUILTIN_CATEGORIES[c] for c in BUILTIN_CATEGORIES}
+    for category_id, meta in (config.get('categories') or {}).items():
+        if not re.match(r'^[a-z][a-z0-9_-]*$', category_id) or category_id in RESERVED_CATEGORY_IDS:
+            print(f"Ignoring invalid category id '{category_id}'")
+            continue
+        meta = meta if isinstance(meta, dict) else {}
+        categories.setdefault(category_id, {
+            'label': str(meta.get('label') or category_id.title()),
+            'icon': str(meta.get('icon') or '•')
+        })
     
-    try:
-        os.kill(pid, signal.SIGTERM)
-        return jsonify({'success': True, 'pid': pid})
-    except ProcessLookupError:
-        return jsonify({'success': False, 'error': 'Process not found'})
-    except PermissionError:
-        return jsonify({'success': False, 'error': 'Permission denied'})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
-
-
-@app.route('/api/stop-daemons', methods=['POST'])
-def stop_daemons():
-    """Stop all Gradle daemons using gradle --stop."""
-    try:
-        subprocess.run(['gradle', '--stop'], capture_output=True, timeout=30)
-        return jsonify({'success': True})
-    except FileNotFoundError:
-        # Try with gradlew if gradle not in PATH
+    rules = []
+    relevant = list(RELEVANT)
+    for entry in config.get('rules') or []:
         try:
-            subprocess.run(['./gradlew', '--stop'], capture_output=True, timeout=30)
-            return jsonify({'success': True})
-        except:
-            pass
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+            category = entry['category']
+            name = str(entry['name'])
+            when = [tuple(alt) if isinstance(alt, list) else (alt,) for alt in entry['match']]
+            if category not in categories:
+                raise ValueError(f"unknown category '{category}'")
+            names = [(name, None, None)]
+            if entry.get('version'):
+                template = name.replace('{', '{{').replace('}', '}}') + ' {0}'
+                names.insert(0, (template, None, ('cmd', entry['version'])))
+            rule = {'category': category, 'when': when, 'names': names}
+            RuleMatcher([rule])  # validate terms and regexes
+        except (KeyError, TypeError, ValueError, re.error) as e:
+            print(f"Ignoring invalid rule {entry!r}: {e}")
+            continue
+        rules.append(rule)
+        relevant.extend(when)
     
-    return jsonify({'success': False, 'error': 'Gradle not found'})
+    return RuleMatcher(rules + PROCESS_RULES, relevant, categories)
 
 
-@app.route('/api/config', methods=['GET'])
-def get_config():
-    """Get current configuration."""
-    return jsonify({
-        'port': CURRENT_PORT,
-        'config_file': str(CONFIG_FILE)
-    })
+def update_rule_matcher(config):
+    """Recompile the rule matcher if the config object changed.
+    
+    Returns True when the rules were rebuilt; the classification memo is
+    cleared then, since cached results may no longer hold.
+    """
+    global _rule_matcher, _rule_matcher_source
+    if config is _rule_matcher_source:
+        return False
+    _rule_matcher = compile_user_rules(config)
+    _rule_matcher_source = config
+    _classify_cache.clear()
+    return True
 
 
-@app.route('/api/config/port', methods=['POST'])
-def change_port():
-    """Change port - saves to config, used on next app start."""
-    data = request.get_json() or {}
-    new_port = data.get('port')
+def classify_process(proc_name, cmdline):
+    """Classify a process from its name and cmdline alone.
     
-    if not new_port:
-        return jsonify({'success': False, 'error': 'Port is required'}), 400
+    Returns (category, name, heap) or None if the process is not relevant.
+    """
+    return _rule_matcher.classify(proc_name, cmdline)
+
+
+# Attributes fetched only for processes that passed classification
+DETAIL_ATTRS = ['username', 'cpu_times', 'memory_info', 'create_time']
+
+# Process collectors - both hand the same records to get_all_processes():
+#   list_processes()  -> (pid, create_time, ppid, handle) for every process
+#   exec_name(h)      -> kernel name (comm) from the listing, free to read;
+#                        it changes when the process execs another binary
+#   read_identity(h)  -> (name, cmdline) used for classification
+#   read_details(h)   -> dict of username, cpu_user, cpu_system (seconds),
+#                        memory, create_time
+#   read_slow(h, attr) -> one of SLOW_ATTRS; may block, runs on a worker
+#                        thread, so it must not touch shared buffers
+# Failures surface as psutil exceptions so the scan handles them uniformly.
+class PsutilCollector:
+    """Portable collector backed by psutil."""
     
-    try:
-        new_port = int(new_port)
-        if new_port < 1024 or new_port > 65535:
-            return jsonify({'success': False, 'error': 'Port must be between 1024 and 65535'}), 400
-    except (ValueError, TypeError):
-        return jsonify({'success': False, 'error': 'Invalid port number'}), 400
+    name = 'psutil'
     
-    if new_port == CURRENT_PORT:
-        return jsonify({'success': True, 'message': 'Port unchanged', 'port': new_port})
+    def list_processes(self):
+        for proc in psutil.process_iter(['create_time', 'ppid', 'name']):
+            yield proc.pid, proc.info['create_time'], proc.info['ppid'], proc
     
-    # Save new port to config
-    config = load_config()
-    config['port'] = new_port
-    if not save_config(config):
-        return jsonify({'success': False, 'error': 'Failed to save config'}), 500
+    def exec_name(self, proc):
+        return proc.info['name'] or ''
     
-    return jsonify({
-        'success': True, 
-        'message': f'Port saved. Will use port {new_port} on next restart.',
-        'port': new_port
-    })
-
-
-# PID file for daemon management
-PID_FILE = CONFIG_DIR / 'gradik.pid'
-
-
-def get_running_pid():
-    """Get PID of running Gradik instance."""
-    if PID_FILE.exists():
+    def read_identity(self, proc):
+        with proc.oneshot():
+            pinfo = proc.as_dict(attrs=['name', 'cmdline'])
+        return pinfo['name'] or '', ' '.join(pinfo['cmdline'] or [])
+    
+    def read_details(self, proc):
+        with proc.oneshot():
+            pinfo = proc.as_dict(attrs=DETAIL_ATTRS)
+        return {
+            'username': pinfo['username'],
+            'cpu_user': pinfo['cpu_times'].user if pinfo['cpu_times'] else 0.0,
+            'cpu_system': pinfo['cpu_times'].system if pinfo['cpu_times'] else 0.0,
+            'memory': pinfo['memory_info'].rss if pinfo['memory_info'] else 0,
+            'create_time': pinfo['create_time']
+        }
+    
+    def read_slow(self, proc, attr):
         try:
-            pid = int(PID_FILE.read_text().strip())
-            # Check if process is actually running
-            if psutil.pid_exists(pid):
-                try:
-                    proc = psutil.Process(pid)
-                    if 'python' in proc.name().lower() and 'gradik' in ' '.join(proc.cmdline()).lower():
-                        return pid
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-            # Stale PID file
-            PID_FILE.unlink(missing_ok=True)
-        except (ValueError, OSError):
-            PID_FILE.unlink(missing_ok=True)
-    return None
+            if attr == 'cwd':
+                return proc.cwd()
+            if attr == 'uss':
+                return proc.memory_full_info().uss
+        except psutil.AccessDenied:
+            return None
+        raise ValueError(f"Unknown attribute '{attr}'")
 
 
-def write_pid():
+class ProcfsCollector:
+    """Linux collector that reads /proc/<pid>/* directly.
+    
+    Avoids per-process psutil objects and reads every file through one
+    reused buffer. Produces the same records as PsutilCollector.
+    """
+    
+    name = 'procfs'
+    
+    def __init__(self, procfs='/proc'):
+        self.procfs = procfs
+        self._buf = bytearray(8192)
+        self._page_size = os.sysconf('SC_PAGE_SIZE')
+        self._clock_ticks = os.sysconf('SC_CLK_TCK')
+        self._boot_time = self._read_boot_time()
+        self._usernames = {}
+    
+    @staticmethod
+    def available(procfs='/proc'):
+        return sys.platform.startswith('linux') and os.path.exists(f'{procfs}/self/stat')
+    
+    def _read(self, path):
+        """Read a whole file into the shared buffer and return its bytes."""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            total = 0
+            while True:
+                if total == len(self._buf):
+                    self._buf.extend(bytes(len(self._buf)))
+                n = os.readv(fd, [memoryview(self._buf)[total:]])
+                if n == 0:
+                    break
+                total += n
+            return bytes(memoryview(self._buf)[:total])
+        finally:
+            os.close(fd)
+    
+    def _read_pid(self, pid, name):
+        try:
+            return self._read(f'{self.procfs}/{pid}/{name}')
+        except (FileNotFoundError, ProcessLookupError):
+            raise psutil.NoSuchProcess(pid)
+        except PermissionError:
+            raise psutil.AccessDenied(pid)
+    
+    def _read_boot_time(self):
+        for line in self._read(f'{self.procfs}/stat').splitlines():
+            if line.startswith(b'btime'):
+                return float(line.split()[1])
+        raise RuntimeError(f"line 'btime' not found in {self.procfs}/stat")
+    
+    def list_processes(self):
+        pids = sorted(int(entry) for entry in os.listdir(self.procfs) if entry.isdigit())
+        for pid in pids:
+            try:
+                data = self._read_pid(pid, 'stat')
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            # comm may contain spaces and parens, so split around the last ')'
+            rpar = data.rfind(b')')
+            comm = data[data.find(b'(') + 1:rpar].decode('utf-8', 'surrogateescape')
+            fields = data[rpar + 2:].split()
+            create_time = (float(fields[19]) / self._clock_ticks) + self._boot_time
+            yield pid, create_time, int(fields[1]), (pid, create_time, comm, fields)
+    
+    def exec_name(self, handle):
+        return handle[2]
+    
+    def _read_cmdline(self, pid):
+        # Same parsing rules as psutil, including setproctitle()-style
+        # cmdlines that use spaces instead of null bytes.
+        data = self._read_pid(pid, 'cmdline').decode('utf-8', 'surrogateescape')
+        if not data:
+            return []
+        sep = '\x00' if data.endswith('\x00') else ' '
+        if data.endswith(sep):
+            data = data[:-1]
+        cmdline = data.split(sep)
+        if sep == '\x00' and len(cmdline) == 1 and ' ' in data:
+            cmdline = data.split(' ')
+        return cmdline
+    
+    def read_identity(self, handle):
+        pid, _, comm, _ = handle
+        try:
+            cmdline = self._read_cmdline(pid)
+        except psutil.AccessDenied:
+            cmdline = []
+        name = comm
+        # The kernel truncates comm to 15 chars; recover it from argv[0]
+        if len(name) >= 15 and cmdline:
+            extended_name = os.path.basename(cmdline[0])
+            if extended_name.startswith(name):
+                name = extended_name
+        return name, ' '.join(cmdline)
+    
+    def _username(self, pid):
+        import pwd
+        
+        for line in self._read_pid(pid, 'status').splitlines():
+            if line.startswith(b'Uid:'):
+                uid = int(line.split()[1])
+                break
+        else:
+            return None
+        if uid not in self._usernames:
+            try:
+                self._usernames[uid] = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                self._usernames[uid] = str(uid)
+        return self._usernames[uid]
+    
+    def _cwd(self, pid):
+        try:
+            path = os.readlink(f'{self.procfs}/{pid}/cwd')
+        except (FileNotFoundError, ProcessLookupError):
+            raise psutil.NoSuchProcess(pid)
+        except PermissionError:
+            return None
+        path = path.split('\x00')[0]
+        if path.endswith(' (deleted)') and not os.path.exists(path):
+            path = path[:-10]
+        return path
+    
+    def read_details(self, handle):
+        pid, create_time, _, fields = handle
+        statm = self._read_pid(pid, 'statm').split()
+        return {
+            'username': self._username(pid),
+            'cpu_user': int(fields[11]) / self._clock_ticks,
+            'cpu_system': int(fields[12]) / self._clock_ticks,
+            'memory': int(statm[1]) * self._page_size,
+            'create_time': create_time
+        }
+    
+    def _uss(self, pid):
+        # Private pages only, like psutil's memory_full_info().uss
+        try:
+            with open(f'{self.procfs}/{pid}/smaps_rollup', 'rb') as f:
+                data = f.read()
+        except (FileNotFoundError, ProcessLookupError):
+            raise psutil.NoSuchProcess(pid)
+        except PermissionError:
+            return None
+        uss = 0
+        for line in data.splitlines():
+            if line.startswith((b'Private_Clean:', b'Private_Dirty:')):
+                uss += int(line.split()[1]) * 1024
+        return uss
+    
+    def read_slow(self, handle, attr):
+        pid = handle[0]
+        if attr == 'cwd':
+            return self._cwd(pid)
+        if attr == 'uss':
+            return self._uss(pid)
+        raise ValueError(f"Unknown attribute '{attr}'")
+
+
+COLLECTORS = {
+    'psutil': PsutilCollector,
+    'procfs': ProcfsCollector,
+}
+
+_collector = None
+
+
+def create_collector(choice='auto'):
+    """Create a collector by name; 'auto' prefers procfs on Linux."""
+    if choice in ('auto', 'procfs') and ProcfsCollector.available():
+        return ProcfsCollector()
+    if choice not in COLLECTORS and choice != 'auto':
+        print(f"Unknown collector '{choice}', using psutil")
+    return PsutilCollector()
+
+
+def compare_collectors(a, b):
+    """Return a list of differences between the records of two collectors.
+    
+    Only processes seen by both are compared; cpu and memory are skipped
+    since they move between the two reads.
+    """
+    records_a = {pid: (ctime, ppid, handle) for pid, ctime, ppid, handle in a.list_processes()}
+    differences = []
+    for pid, ctime, ppid, handle in b.list_processes():
+        if pid not in records_a:
+            continue
+        ctime_a, ppid_a, handle_a = records_a[pid]
+        try:
+            identity = (a.read_identity(handle_a), b.read_identity(handle))
+            details_a, details_b = a.read_details(handle_a), b.read_details(handle)
+            details_a['cwd'], details_b['cwd'] = a.read_slow(handle_a, 'cwd'), b.read_slow(handle, 'cwd')
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+        if ctime_a != ctime:
+            differences.append((pid, 'create_time', ctime_a, ctime))
+        if ppid_a != ppid:
+            differences.append((pid, 'ppid', ppid_a, ppid))
+        if identity[0] != identity[1]:
+            differences.append((pid, 'identity', identity[0], identity[1]))
+        for field in ('username', 'cwd'):
+            if details_a[field] != details_b[field]:
+                differences.append((pid, field, details_a[field], details_b[field]))
+    return differences
+
+
+def get_collector():
+    """Return the configured collector, creating it on first use.
+    
+    In 'auto' mode the procfs collector is checked against psutil once;
+    any difference falls back to psutil.
+    """
+    global _collector
+    if _collector is None:
+        choice = load_config().get('collector', 'auto')
+        collector = create_collector(choice)
+        if choice == 'auto' and collector.name != 'psutil':
+            try:
+                differences = compare_collectors(PsutilCollector(), collector)
+            except Exception as e:
+                differences = [('error', str(e))]
+            if differences:
+                print(f"Collector '{collector.name}' disagrees with psutil, using psutil: {differences[:3]}")
+                collector = PsutilCollector()
+        _collector = collector
+    return _collector
+
+
+# Classification memo: (pid, create_time) -> (exec name, (category, name,
+# heap) or None). exec keeps the pid and create time, so the entry is only
+# trusted while the exec name matches: a gradlew or studio.sh wrapper that
+# execs into java is classified again. Otherwise each process is
+# classified once; irrelevant ones are cached as None and skipped.
+_classify_cache = {}
+_classify_hits = 0
+_classify_misses = 0
+
+
+def get_classify_stats():
+    """Return classification cache counters."""
+    return {
+        'size': len(_classify_cache),
+        'hits': _classify_hits,
+        'misses': _classify_misses
+    }
+
+
+# Slow per-process attributes, fetched concurrently with a deadline each
+# (seconds from the start of the fetch). 'uss' reads smaps and is opt-in
+# via the 'collect_uss' config key.
+SLOW_ATTRS = {'cwd': 0.05, 'uss': 0.2}
+FETCH_WORKERS = 4
+
+_fetch_pool = None
+_slow_values = {}    # ((pid, create_time), attr) -> last known value
+_slow_inflight = {}  # ((pid, create_time), attr) -> Future still running
+# Guards both dicts: fetch results land from the pool's threads
+_slow_lock = threading.Lock()
+
+
+def _get_fetch_pool():
+    global _fetch_pool
+    if _fetch_pool is None:
+        workers = current_config().get('fetch_workers', FETCH_WORKERS)
+        _fetch_pool = ThreadPoolExecutor(max_workers=max(1, int(workers)),
+                                         thread_name_prefix='gradik-fetch')
+    return _fetch_pool
+
+
+def fetch_slow_attrs(collector, items, attrs):
+    """Fetch slow attributes for matched processes on the worker pool.
+    
+    items is a list of (key, handle). Returns {key: {attr: value}} plus a
+    {key: [attr, ...]} map of attributes that missed their deadline; those
+    carry the last known value instead. A late fetch keeps running and
+    its result is used on a later cycle; until it finishes, nothing new is
+    submitted for that process, so a hung /proc read ties up at most one
+    pool worker per process.
+    """
+    pool = _get_fetch_pool()
+    deadlines = current_config().get('fetch_deadlines_ms') or {}
+    start = time.monotonic()
+    
+    def remember(slot, future):
+        try:
+            value = future.result()
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            with _slow_lock:
+                _slow_inflight.pop(slot, None)
+                _slow_values.pop(slot, None)
+            return
+        except Exception:
+            with _slow_lock:
+                _slow_inflight.pop(slot, None)
+            return
+        with _slow_lock:
+            _slow_inflight.pop(slot, None)
+            _slow_values[slot] = value
+    
+    with _slow_lock:
+        busy = {slot[0] for slot in _slow_inflight}
+    pending = {attr: [] for attr in attrs}
+    submitted = []
+    values = {key: {} for key, _ in items}
+    stale = {}
+    for key, handle in items:
+        if key in busy:
+            # Still waiting on an earlier fetch: serve the last known values
+            with _slow_lock:
+                for attr in attrs:
+                    values[key][attr] = _slow_values.get((key, attr))
+            stale[key] = list(attrs)
+            continue
+        for attr in attrs:
+            slot = (key, attr)
+            future = pool.submit(collector.read_slow, handle, attr)
+            with _slow_lock:
+                _slow_inflight[slot] = future
+            submitted.append((slot, future))
+            pending[attr].append((key, future))
+    # Outside the lock: a future that is already done runs its callback here
+    for slot, future in submitted:
+        future.add_done_callback(lambda f, slot=slot: remember(slot, f))
+    
+    for attr, futures in pending.items():
+        deadline = deadlines.get(attr, SLOW_ATTRS[attr] * 1000) / 1000
+        wait([f for _, f in futures], timeout=max(0.0, start + deadline - time.monotonic()))
+        for key, future in futures:
+            if future.done():
+                try:
+                    values[key][attr] = future.result()
+                except Exception:
+                    values[key][attr] = None
+            else:
+                with _slow_lock:
+                    values[key][attr] = _slow_values.get((key, attr))
+                stale.setdefault(key, []).append(attr)
+    return values, stale
+
+
+# JVM perf counters. Every HotSpot JVM publishes counters in a shared
+# memory file, hsperfdata_<user>/<pid> under java.io.tmpdir, which is what
+# jstat reads. The entry table is parsed once per file; each cycle only
+# re-reads the counter values at their known offsets in the mmap.
+HSPERF_MAGIC = b'\xca\xfe\xc0\xc0'
+HSPERF_RETRY = 30.0  # seconds before looking again for a missing file
+JVM_COUNTER_CATEGORIES = ('gradle', 'kotlin')
+
+# Long scalar counters we read; everything else in the table is skipped
+HSPERF_COUNTERS = re.compile(
+    r'^(sun\.gc\.generation\.\d+\.(?:space\.\d+\.used|capacity|maxCapacity)'
+    r'|sun\.gc\.collector\.\d+\.(?:invocations|time)'
+    r'|sun\.gc\.metaspace\.used'
+    r'|sun\.os\.hrt\.frequency'
+    r'|sun\.rt\.safepoints)$')
+
+
+class HsperfReader:
+    """Reads HotSpot perf counters from one hsperfdata file via mmap.
+    
+    File layout (all fields after the magic use the file's byte order):
+        prologue: magic u4, byte_order u1, major u1, minor u1, accessible u1,
+                  used i4, overflow i4, mod_time_stamp i8,
+                  entry_offset i4, num_entries i4
+        entry:    entry_length i4, name_offset i4, vector_length i4,
+                  data_type u1, flags u1, data_units u1, data_variability u1,
+                  data_offset i4, then the NUL-terminated name and the data
+    """
+    
+    def __init__(self, path):
+        import mmap
+        
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:4] != HSPERF_MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not an hsperfdata file')
+        self._order = '<' if self._mmap[4] == 1 else '>'
+        self._num_entries = None
+        self._offsets = {}
+        self._prev_gc = None  # (gc seconds, monotonic)
+    
+    def close(self):
+        self._mmap.close()
+    
+    def _parse_entries(self, entry_offset, num_entries):
+        """Map counter name -> value offset for the counters we use."""
+        entry = self._order + 'iiiBBBBi'
+        entry_size = struct.calcsize(entry)
+        offsets = {}
+        offset = entry_offset
+        for _ in range(num_entries):
+            if offset + entry_size > len(self._mmap):
+                break
+            length, name_offset, vector_length, data_type, _, _, _, data_offset = \
+                struct.unpack_from(entry, self._mmap, offset)
+            if length < entry_size:
+                break
+            name_start = offset + name_offset
+            name = self._mmap[name_start:self._mmap.find(b'\0', name_start)].decode('ascii', 'replace')
+            if data_type == ord('J') and vector_length == 0 and HSPERF_COUNTERS.match(name):
+                offsets[name] = offset + data_offset
+            offset += length
+        self._offsets = offsets
+        self._num_entries = num_entries
+    
+    def read(self):
+        """Return raw counter values, or None until the JVM marks the file accessible."""
+        if not self._mmap[7]:
+            return None
+        entry_offset, num_entries = struct.unpack_from(self._order + 'ii', self._mmap, 24)
+        # The JVM only appends entries, so re-parse when the count grows
+        if num_entries != self._num_entries:
+            self._parse_entries(entry_offset, num_entries)
+        long_value = self._order + 'q'
+        return {name: struct.unpack_from(long_value, self._mmap, offset)[0]
+                for name, offset in self._offsets.items()}
+    
+    def stats(self):
+        """Return heap and GC stats derived from the counters, or None."""
+        counters = self.read()
+        if counters is None:
+            return None
+        
+        heap_used = heap_committed = heap_max = 0
+        gc_count = gc_ticks = 0
+        for name, value in counters.items():
+            parts = name.split('.')
+            if parts[1] == 'gc' and parts[2] == 'generation':
+                if parts[-1] == 'used':
+                    heap_used += value
+                elif parts[-1] == 'capacity':
+                    heap_committed += value
+                elif parts[-1] == 'maxCapacity':
+                    heap_max += value
+            elif parts[1] == 'gc' and parts[2] == 'collector':
+                if parts[-1] == 'invocations':
+                    gc_count += value
+                else:
+                    gc_ticks += value
+        
+        frequency = counters.get('sun.os.hrt.frequency') or 1
+        gc_time = gc_ticks / frequency
+        now = time.monotonic()
+        gc_rate = 0.0
+        if self._prev_gc and now > self._prev_gc[1]:
+            gc_rate = max(gc_time - self._prev_gc[0], 0.0) / (now - self._prev_gc[1]) * 100
+        self._prev_gc = (gc_time, now)
+        
+        return {
+            'heap_used': heap_used,
+            'heap_committed': heap_committed,
+            'heap_max': heap_max,
+            'metaspace_used': counters.get('sun.gc.metaspace.used', 0),
+            'gc_count': gc_count,
+            'gc_time': round(gc_time, 3),
+            'gc_rate': round(gc_rate, 2),
+            'safepoints': counters.get('sun.rt.safepoints', 0)
+        }
+
+
+# (pid, create_time) -> (HsperfReader or None, monotonic of last attempt)
+_hsperf_readers = {}
+
+
+def hsperf_path(pid, username):
+    """Return the hsperfdata file of a JVM, or None if there is none."""
+    import tempfile
+    
+    for tmpdir in dict.fromkeys([tempfile.gettempdir(), '/tmp']):
+        path = os.path.join(tmpdir, f'hsperfdata_{username}', str(pid))
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def get_jvm_stats(key, username):
+    """Return heap/GC stats for a JVM process, or None when unavailable."""
+    reader, attempted = _hsperf_readers.get(key, (None, None))
+    if reader is None:
+        if attempted is not None and time.monotonic() - attempted < HSPERF_RETRY:
+            return None
+        path = hsperf_path(key[0], username)
+        try:
+            reader = HsperfReader(path) if path else None
+        except (OSError, ValueError):
+            reader = None
+        _hsperf_readers[key] = (reader, time.monotonic())
+        if reader is None:
+            return None
+    try:
+        return reader.stats()
+    except (struct.error, ValueError, IndexError):
+        return None
+
+
+def prune_hsperf_readers(seen):
+    for key in [k for k in _hsperf_readers if k not in seen]:
+        reader = _hsperf_readers.pop(key)[0]
+        if reader:
+            reader.close()
+
+
+# Gradle daemon registry. Each Gradle version keeps a registry.bin under
+# <gradle user home>/daemon/<version>/ in which clients and daemons record
+# every daemon's state and when it last went idle, written with Gradle's
+# DataOutput-backed encoder (big-endian, strings as u2 length + UTF-8).
+DAEMON_STATES = ('Idle', 'Busy', 'Canceled', 'StopRequested', 'Stopped', 'ForceStopped')
+
+# A daemon entry is: token, state u1, lastBusy i8 (epoch ms), then its
+# context: uid (nullable string, a UUID), javaHome, ..., registryDir,
+# pid (nullable i8), ... The context has gained fields across Gradle
+# versions, so entries are located by two stable anchors instead of being
+# decoded front to back: the uid, whose fixed shape pins state and
+# lastBusy right before it, and the registry dir, followed by the pid.
+DAEMON_UID = re.compile(rb'\x01\x00\x24[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+# registry.bin path -> ((mtime_ns, size), {pid: entry})
+_daemon_registries = {}
+
+
+def parse_daemon_registry(data, version):
+    """Return {pid: {'state', 'last_busy'}} from registry.bin contents."""
+    pid_anchor = re.compile(rb'[/\\]daemon[/\\]' + re.escape(version.encode()) + rb'\x01(.{8})', re.S)
+    starts = [m.start() for m in DAEMON_UID.finditer(data)]
+    daemons = {}
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(data)
+        match = pid_anchor.search(data, start, end)
+        if start < 9 or not match:
+            continue
+        state = data[start - 9]
+        last_busy = struct.unpack_from('>q', data, start - 8)[0]
+        daemons[struct.unpack('>q', match.group(1))[0]] = {
+            'state': DAEMON_STATES[state] if state < len(DAEMON_STATES) else 'Unknown',
+            'last_busy': last_busy / 1000
+        }
+    return daemons
+
+
+def gradle_user_home():
+    home = current_config().get('gradle_user_home') or os.environ.get('GRADLE_USER_HOME')
+    return Path(home).expanduser() if home else Path.home() / '.gradle'
+
+
+def get_daemon_states():
+    """Return {pid: {'state', 'last_busy'}} for daemons in every registry.
+    
+    A registry is only re-read when its mtime or size changes.
+    """
+    daemons = {}
+    seen = set()
+    try:
+        entries = list(os.scandir(gradle_user_home() / 'daemon'))
+    except OSError:
+        entries = []
+    for entry in entries:
+        path = os.path.join(entry.path, 'registry.bin')
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        seen.add(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = _daemon_registries.get(path)
+        if cached is None or cached[0] != stamp:
+            try:
+                with open(path, 'rb') as f:
+                    parsed = parse_daemon_registry(f.read(), entry.name)
+            except (OSError, struct.error):
+                parsed = {}
+            cached = _daemon_registries[path] = (stamp, parsed)
+        daemons.update(cached[1])
+    for path in [p for p in _daemon_registries if p not in seen]:
+        del _daemon_registries[path]
+    return daemons
+
+
+# Kotlin compile daemons. Each live daemon keeps a run file named
+# kotlin-daemon.<timestamp>.<digest>.<port>.run in the Kotlin daemon
+# directory, and serves its clients (Gradle daemons, IDEs) over RMI on
+# that port; the daemon that first started it is also its parent.
+KOTLIN_RUN_FILE = re.compile(r'^kotlin-daemon\.(.+)\.(\d+)\.run$')
+KOTLIN_CLIENT_CATEGORIES = ('gradle', 'studio', 'ide')
+
+# run file directory -> (mtime_ns, {port: run file})
+_kotlin_run_dirs = {}
+
+
+def kotlin_daemon_dirs():
+    configured = current_config().get('kotlin_daemon_dir')
+    if configured:
+        return [Path(configured).expanduser()]
+    if sys.platform == 'darwin':
+        base = Path.home() / 'Library' / 'Application Support'
+    elif os.name == 'nt':
+        base = Path(os.environ.get('LOCALAPPDATA') or Path.home())
+    else:
+        base = Path(os.environ.get('XDG_DATA_HOME') or Path.home() / '.local' / 'share')
+    return [base / 'kotlin' / 'daemon', Path.home() / '.kotlin' / 'daemon']
+
+
+def get_kotlin_run_files():
+    """Return {port: {'file', 'digest'}} for every Kotlin daemon run file.
+    
+    A directory is only listed again when its mtime changes, which happens
+    whenever a daemon creates or removes its run file.
+    """
+    run_files = {}
+    for path in kotlin_daemon_dirs():
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            _kotlin_run_dirs.pop(path, None)
+            continue
+        cached = _kotlin_run_dirs.get(path)
+        if cached is None or cached[0] != mtime:
+            found = {}
+            try:
+                for entry in os.scandir(path):
+                    match = KOTLIN_RUN_FILE.match(entry.name)
+                    if match:
+                        found[int(match.group(2))] = {
+                            'file': entry.path,
+                            'digest': match.group(1).rsplit('.', 1)[-1]
+                        }
+            except OSError:
+                pass
+            cached = _kotlin_run_dirs[path] = (mtime, found)
+        run_files.update(cached[1])
+    return run_files
+
+
+def tcp_connections(pid):
+    try:
+        proc = psutil.Process(pid)
+        # net_connections() replaced connections() in psutil 6
+        connections = getattr(proc, 'net_connections', None) or proc.connections
+        return connections(kind='tcp')
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return []
+
+
+def link_kotlin_daemons(rows, parents):
+    """Attach each Kotlin daemon's clients and run file to its row.
+    
+    Clients are the Gradle daemons connected to the port of the daemon's
+    run file, plus its parent when that is a tracked Gradle daemon or IDE.
+    A Kotlin daemon without any client is flagged as an orphan.
+    """
+    daemons = [info for _, _, category, info in rows
+               if category == 'kotlin' and 'Daemon' in info['name']]
+    if not daemons:
+        return
+    
+    run_files = get_kotlin_run_files()
+    ports = {}
+    for info in daemons:
+        for conn in tcp_connections(info['pid']):
+            if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port in run_files:
+                ports[conn.laddr.port] = info['pid']
+    
+    clients = {info['pid']: set() for info in daemons}
+    parent_candidates = set()
+    for _, _, category, info in rows:
+        if category not in KOTLIN_CLIENT_CATEGORIES:
+            continue
+        parent_candidates.add(info['pid'])
+        if not ports or not info['name'].startswith('GradleDaemon'):
+            continue
+        for conn in tcp_connections(info['pid']):
+            if conn.raddr and conn.raddr.port in ports and conn.status == psutil.CONN_ESTABLISHED:
+                clients[ports[conn.raddr.port]].add(info['pid'])
+    
+    for info in daemons:
+        served = clients[info['pid']]
+        if parents.get(info['pid']) in parent_candidates:
+            served.add(parents[info['pid']])
+        port = next((p for p, pid in ports.items() if pid == info['pid']), None)
+        info['kotlin_daemon'] = {
+            'clients': sorted(served),
+            'orphan': not served,
+            'port': port,
+            'run_file': run_files[port]['file'] if port else None
+        }
+
+
+# Gradle daemon compatibility. A client only reuses a daemon started with
+# the same Java home and JVM arguments (heap, encoding, locale, ...), so
+# every distinct argument set of a Gradle version costs one more daemon.
+# (pid, create_time) -> parsed command line of a GradleDaemon
+_daemon_args = {}
+# Java executable at the start of a command line; group 1 is the Java home
+JAVA_COMMAND = re.compile(r'^"?(.*?)[/\\]bin[/\\]javaw?(?:\.exe)?"?(?:\s|$)')
+
+
+def parse_daemon_cmdline(cmdline):
+    """Return (version, java_home, jvm args) of a GradleDaemon command line.
+    
+    The classpath is left out: it only depends on the Gradle version.
+    """
+    match = JAVA_COMMAND.match(cmdline)
+    java_home = match.group(1) if match else ''
+    tokens = cmdline[match.end():].split() if match else cmdline.split()[1:]
+    version = None
+    args = []
+    i = 0
+    while i < len(tokens):
+        arg = tokens[i]
+        if arg.endswith('GradleDaemon'):
+            version = tokens[i + 1] if i + 1 < len(tokens) else None
+            break
+        if arg in ('-cp', '-classpath', '--class-path'):
+            i += 2
+            continue
+        # Keep the value of '--add-opens X' style options with the option
+        if arg.startswith('--') and '=' not in arg and i + 1 < len(tokens) and not tokens[i + 1].startswith('-'):
+            i += 1
+            arg += '=' + tokens[i]
+        args.append(arg)
+        i += 1
+    return version, java_home, tuple(args)
+
+
+def daemon_option(arg):
+    """Name of the JVM option an argument sets, for diffing argument sets."""
+    if arg.startswith('-D'):
+        return arg.split('=', 1)[0]
+    if arg.startswith('-XX:'):
+        return arg.split('=', 1)[0].replace('-XX:+', '-XX:').replace('-XX:-', '-XX:')
+    match = re.match(r'-X(?:mx|ms|ss|mn)', arg)
+    return match.group(0) if match else arg
+
+
+def compat_key(parsed):
+    import hashlib
+    
+    return hashlib.sha1(repr(parsed).encode()).hexdigest()[:8]
+
+
+def analyze_daemons(processes):
+    """Group live Gradle daemons of each version by compatibility key.
+    
+    The oldest daemon of a version is the baseline. Every other group
+    lists the option changes (and Java home) that kept it from reusing the
+    baseline; extra daemons with the baseline's own key were started while
+    the compatible ones were busy. 'duplicate_memory' is what all but the
+    baseline daemon cost.
+    """
+    parsed = {key[0]: (key[1], args) for key, args in _daemon_args.items()}
+    versions = {}
+    for proc_info in processes.get('gradle', []):
+        if proc_info['pid'] in parsed:
+            create_time, cmd = parsed[proc_info['pid']]
+            versions.setdefault(cmd[0], []).append((create_time, proc_info, cmd))
+    
+    result = []
+    for version, daemons in sorted(versions.items(), key=lambda item: str(item[0])):
+        daemons.sort(key=lambda d: d[0])
+        baseline = daemons[0][2]
+        base_options = {daemon_option(arg): arg for arg in baseline[2]}
+        groups = {}
+        for _, proc_info, cmd in daemons:
+            key = compat_key(cmd)
+            if key not in groups:
+                options = {daemon_option(arg): arg for arg in cmd[2]}
+                changes = [{'option': name, 'from': base_options.get(name), 'to': options.get(name)}
+                           for name in sorted(set(base_options) | set(options))
+                           if base_options.get(name) != options.get(name)]
+                groups[key] = {
+                    'key': key,
+                    'java_home': cmd[1],
+                    'baseline': cmd == baseline,
+                    'java_home_changed': cmd[1] != baseline[1],
+                    'changes': changes,
+                    'pids': [],
+                    'memory': 0
+                }
+            groups[key]['pids'].append(proc_info['pid'])
+            groups[key]['memory'] += proc_info['memory']
+        result.append({
+            'version': version,
+            'daemons': len(daemons),
+            'groups': list(groups.values()),
+            'duplicate_memory': sum(d[1]['memory'] for d in daemons[1:])
+        })
+    return result
+
+
+# Logical process identity. A restarted daemon gets a new pid but is still
+# "the 8.5 daemon for this project": category, version, cwd and a
+# fingerprint of the Java home and JVM options name it across restarts.
+# Metrics and alerts key on the identity so their series carry on.
+IDENTITY_RETENTION = 24 * 3600  # seconds an identity is listed after its last process
+# Options that change between runs of the same JVM (debug ports, dump paths)
+VOLATILE_JVM_ARGS = re.compile(
+    r'^-(?:D[\w.-]*(?:port|pid|hostname)[\w.-]*='
+    r'|XX:(?:HeapDumpPath|ErrorFile)='
+    r'|Xlog:|Xloggc:|agentlib:jdwp|Xrunjdwp)', re.IGNORECASE)
+
+# (pid, create_time) -> (identity, version, fingerprint, cwd)
+_identities = {}
+# identity -> what it is made of, its live pids and restart count
+_identity_info = {}
+
+
+def jvm_fingerprint(cmdline):
+    """Hash of a command line's Java home and stable JVM options, '' if not Java."""
+    match = JAVA_COMMAND.match(cmdline)
+    if not match:
+        return ''
+    tokens = cmdline[match.end():].split()
+    args = []
+    i = 0
+    while i < len(tokens) and tokens[i].startswith('-') and tokens[i] != '-jar':
+        if tokens[i] in ('-cp', '-classpath', '--class-path'):
+            i += 2
+            continue
+        if not VOLATILE_JVM_ARGS.match(tokens[i]):
+            args.append(tokens[i])
+        i += 1
+    return compat_key((match.group(1), tuple(args)))
+
+
+def process_identity(key, category, proc_info, read_cmdline):
+    """Identity string of a process, memoized for its lifetime.
+    
+    read_cmdline is only called on the first sight of a non-Gradle process.
+    An identity made while the cwd was unreadable is provisional: it is
+    replaced once a later scan gets the cwd.
+    """
+    import hashlib
+    
+    memo = _identities.get(key)
+    if memo is not None and (memo[3] or not proc_info['cwd']):
+        return memo[0]
+    if memo is not None:
+        _, version, fingerprint, _ = memo
+        provisional = _identity_info.get(memo[0])
+        if provisional:
+            provisional['starts'] -= 1
+            if not provisional['starts']:
+                del _identity_info[memo[0]]
+    elif key in _daemon_args:
+        version = _daemon_args[key][0] or ''
+        fingerprint = proc_info['compat']
+    else:
+        match = re.search(r'\d+(?:\.\d+)+', proc_info['name'])
+        version = match.group(0) if match else ''
+        try:
+            fingerprint = jvm_fingerprint(read_cmdline())
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            fingerprint = ''
+    digest = hashlib.sha1(repr((category, version, proc_info['cwd'], fingerprint)).encode()).hexdigest()[:10]
+    identity = f"{category}/{proc_info['name']}/{digest}"
+    _identities[key] = (identity, version, fingerprint, proc_info['cwd'])
+    info = _identity_info.setdefault(identity, {
+        'identity': identity, 'category': category, 'name': proc_info['name'],
+        'version': version, 'cwd': proc_info['cwd'], 'jvm': fingerprint,
+        'first_seen': time.time(), 'starts': 0, 'pids': []
+    })
+    info['starts'] += 1
+    return identity
+
+
+def update_identities(rows):
+    """Refresh live pids and last_seen of identities; drop long-gone ones."""
+    now = time.time()
+    live = {}
+    for key, _, _, proc_info in rows:
+        if 'identity' in proc_info:
+            live.setdefault(proc_info['identity'], []).append(proc_info['pid'])
+    for identity, info in list(_identity_info.items()):
+        info['pids'] = live.get(identity, [])
+        if info['pids']:
+            info['last_seen'] = now
+        elif now - info.get('last_seen', info['first_seen']) > IDENTITY_RETENTION:
+            del _identity_info[identity]
+
+
+def get_identities():
+    return sorted((dict(info) for info in _identity_info.values()),
+                  key=lambda info: info['identity'])
+
+
+# org.gradle.jvmargs advisor. Peak used heap, metaspace and RSS of Gradle
+# daemons are kept per (Gradle version, daemon cwd) across restarts, and
+# turned into -Xmx / MaxMetaspaceSize suggestions with headroom.
+PEAKS_FILE = CONFIG_DIR / 'jvm_peaks.json'
+PEAKS_SAVE_INTERVAL = 60.0  # seconds between writes of changed peaks
+ADVISOR_DEFAULTS = {
+    'heap_headroom': 1.3,       # suggested -Xmx = peak used heap * this
+    'metaspace_headroom': 1.25  # suggested MaxMetaspaceSize = peak * this
+}
+MB = 1024 * 1024
+
+_jvm_peaks = {'entries': None, 'dirty': False, 'saved': 0.0}
+
+
+def load_peaks():
+    try:
+        with open(PEAKS_FILE, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return {}
+
+
+def save_peaks(entries):
+    """Write the peaks file atomically."""
+    try:
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = PEAKS_FILE.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp, PEAKS_FILE)
+        return True
+    except (IOError, OSError):
+        return False
+
+
+def record_jvm_peaks(processes):
+    """Fold the Gradle daemons of one scan into the persisted peaks."""
+    if _jvm_peaks['entries'] is None:
+        _jvm_peaks['entries'] = load_peaks()
+    entries = _jvm_peaks['entries']
+    now = datetime.now().isoformat()
+    for proc_info in processes.get('gradle', []):
+        jvm = proc_info.get('jvm')
+        if not jvm or not proc_info['name'].startswith('GradleDaemon'):
+            continue
+        version = proc_info['name'][len('GradleDaemon'):].strip() or 'unknown'
+        cwd = proc_info['cwd'] or '?'
+        entry = entries.setdefault(f'{version}|{cwd}', {
+            'version': version, 'cwd': cwd,
+            'heap_used': 0, 'metaspace_used': 0, 'rss': 0, 'heap_max': 0
+        })
+        peaks = {'heap_used': jvm['heap_used'], 'metaspace_used': jvm['metaspace_used'],
+                 'rss': proc_info['memory']}
+        for field, value in peaks.items():
+            if value > entry[field]:
+                entry[field] = value
+                entry['updated'] = now
+                _jvm_peaks['dirty'] = True
+        # The configured max of the daemon seen last
+        if jvm['heap_max'] != entry['heap_max']:
+            entry['heap_max'] = jvm['heap_max']
+            _jvm_peaks['dirty'] = True
+    
+    if _jvm_peaks['dirty'] and time.monotonic() - _jvm_peaks['saved'] >= PEAKS_SAVE_INTERVAL:
+        if save_peaks(entries):
+            _jvm_peaks['dirty'] = False
+        _jvm_peaks['saved'] = time.monotonic()
+
+
+def round_up(value, step):
+    return -(-value // step) * step
+
+
+def jvmargs_advice(config):
+    """Return -Xmx / MaxMetaspaceSize suggestions for every recorded daemon."""
+    settings = dict(ADVISOR_DEFAULTS)
+    for key in ADVISOR_DEFAULTS:
+        try:
+            settings[key] = float(config.get(key, settings[key]))
+        except (TypeError, ValueError):
+            pass
+    
+    advice = []
+    for entry in (_jvm_peaks['entries'] or {}).values():
+        heap = max(round_up(int(entry['heap_used'] * settings['heap_headroom']), 256 * MB), 512 * MB)
+        metaspace = max(round_up(int(entry['metaspace_used'] * settings['metaspace_headroom']), 64 * MB), 256 * MB)
+        jvmargs = f'-Xmx{heap // MB}m -XX:MaxMetaspaceSize={metaspace // MB}m'
+        advice.append(dict(entry,
+                           suggested_heap=heap,
+                           suggested_metaspace=metaspace,
+                           jvmargs=f'org.gradle.jvmargs={jvmargs}',
+                           over_provisioned=max(entry['heap_max'] - heap, 0)))
+    advice.sort(key=lambda a: a['over_provisioned'], reverse=True)
+    return advice
+
+
+# maxParallelForks / org.gradle.workers.max advisor. Forked test JVMs
+# under a Gradle daemon are followed per test run, which lasts while the
+# daemon has at least one test executor alive; finished runs are kept
+# per (Gradle version, daemon cwd).
+TEST_RUN_HISTORY = 20        # finished runs kept per daemon
+WORKER_MEMORY_BUDGET = 0.75  # share of RAM the test JVMs may use together
+CPU_SATURATED = 0.9          # share of all cores that counts as saturated
+
+# daemon pid -> the test run in progress
+_test_runs = {}
+# 'version|cwd' -> deque of finished runs
+_test_history = {}
+
+
+def test_workers(trees):
+    """Return {daemon node: [test executor nodes]} from the process trees."""
+    found = {}
+    stack = list(trees.values())
+    while stack:
+        node = stack.pop()
+        if node['category'] == 'gradle' and node['name'].startswith('GradleDaemon'):
+            workers = [child for child in node['children'] if child['name'].startswith('Gradle Test Executor')]
+            if workers:
+                found[node['pid']] = (node, workers)
+        stack.extend(node['children'])
+    return found
+
+
+def record_test_runs(processes, trees):
+    """Fold the test executors of one scan into the current test runs."""
+    cwds = {p['pid']: p['cwd'] for p in processes.get('gradle', [])}
+    vm = psutil.virtual_memory()
+    found = test_workers(trees)
+    for pid, (daemon, workers) in found.items():
+        run = _test_runs.get(pid)
+        if run is None:
+            version = daemon['name'][len('GradleDaemon'):].strip() or 'unknown'
+            run = _test_runs[pid] = {
+                'key': f'{version}|{cwds.get(pid) or "?"}',
+                'started': datetime.now().isoformat(),
+                'peak_workers': 0, 'peak_worker_rss': 0, 'peak_total_rss': 0,
+                'other_memory': 0, 'peak_cpu': 0.0
+            }
+        total_rss = sum(w['memory'] for w in workers)
+        run['peak_workers'] = max(run['peak_workers'], len(workers))
+        run['peak_worker_rss'] = max(run['peak_worker_rss'], max(w['memory'] for w in workers))
+        run['peak_cpu'] = max(run['peak_cpu'], sum(w['cpu'] for w in workers))
+        if total_rss >= run['peak_total_rss']:
+            run['peak_total_rss'] = total_rss
+            run['other_memory'] = max(vm.total - vm.available - total_rss, 0)
+    
+    for pid in [p for p in _test_runs if p not in found]:
+        run = _test_runs.pop(pid)
+        run['ended'] = datetime.now().isoformat()
+        _test_history.setdefault(run['key'], deque(maxlen=TEST_RUN_HISTORY)).append(run)
+
+
+def workers_advice(config):
+    """Recommend maxParallelForks and org.gradle.workers.max per daemon.
+    
+    Forks are capped by memory (how many of the largest test JVM fit in
+    the worker budget next to everything else that was running) and by
+    CPU: when the observed forks already saturated the cores, more of
+    them only add contention.
+    """
+    try:
+        budget_share = float(config.get('worker_memory_budget', WORKER_MEMORY_BUDGET))
+    except (TypeError, ValueError):
+        budget_share = WORKER_MEMORY_BUDGET
+    total = psutil.virtual_memory().total
+    
+    advice = []
+    for key, runs in _test_history.items():
+        peak_workers = max(r['peak_workers'] for r in runs)
+        worker_rss = max(r['peak_worker_rss'] for r in runs)
+        other = max(r['other_memory'] for r in runs)
+        saturation = max(r['peak_cpu'] for r in runs) / (100 * CPU_COUNT)
+        
+        memory_bound = int((total * budget_share - other) // worker_rss) if worker_rss else CPU_COUNT
+        cpu_bound = peak_workers if saturation >= CPU_SATURATED else CPU_COUNT
+        forks = max(1, min(memory_bound, cpu_bound, CPU_COUNT))
+        version, cwd = key.split('|', 1)
+        advice.append({
+            'version': version,
+            'cwd': cwd,
+            'runs': len(runs),
+            'peak_workers': peak_workers,
+            'peak_worker_rss': worker_rss,
+            'cpu_saturation': round(saturation * 100, 1),
+            'max_parallel_forks': forks,
+            'workers_max': max(1, min(memory_bound, CPU_COUNT)),
+            'limited_by': 'memory' if memory_bound < min(cpu_bound, CPU_COUNT) else 'cpu'
+        })
+    return advice
+
+
+# Per-process history: a fixed-size ring of (timestamp, cpu, rss, heap)
+# per process in array.array columns, 28 bytes a sample. Rings of exited
+# processes are kept until the total budget forces the least recently
+# updated ones out.
+HISTORY_SAMPLES = 600         # samples kept per process
+HISTORY_MAX_BYTES = 16 * MB
+
+
+class SeriesRing:
+    """Fixed-size ring of (ts, cpu, rss, heap) samples."""
+    
+    __slots__ = ('size', 'count', 'head', 'ts', 'cpu', 'rss', 'heap')
+    SAMPLE_BYTES = 8 + 4 + 8 + 8
+    
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        self.head = 0
+        self.ts = array('d', bytes(8 * size))
+        self.cpu = array('f', bytes(4 * size))
+        self.rss = array('q', bytes(8 * size))
+        self.heap = array('q', bytes(8 * size))
+    
+    def append(self, ts, cpu, rss, heap):
+        i = self.head
+        self.ts[i] = ts
+        self.cpu[i] = cpu
+        self.rss[i] = rss
+        self.heap[i] = heap
+        self.head = (i + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+    
+    def last(self):
+        return self.ts[self.head - 1] if self.count else 0.0
+    
+    def window(self, since=None, until=None):
+        """Return {'ts', 'cpu', 'rss', 'heap'} lists for since <= ts <= until."""
+        start = (self.head - self.count) % self.size
+        
+        def ordered(column):
+            if start + self.count <= self.size:
+                return column[start:start + self.count]
+            return column[start:] + column[:self.head]
+        
+        ts = ordered(self.ts)
+        lo = bisect_left(ts, since) if since is not None else 0
+        hi = bisect_right(ts, until) if until is not None else len(ts)
+        return {
+            'ts': ts[lo:hi].tolist(),
+            'cpu': [round(v, 1) for v in ordered(self.cpu)[lo:hi]],
+            'rss': ordered(self.rss)[lo:hi].tolist(),
+            'heap': ordered(self.heap)[lo:hi].tolist()
+        }
+
+
+# (pid, create_time) -> SeriesRing, least recently updated first
+_history = {}
+_history_lock = threading.Lock()
+
+
+def history_settings(config):
+    try:
+        samples = max(int(config.get('history_samples', HISTORY_SAMPLES)), 2)
+    except (TypeError, ValueError):
+        samples = HISTORY_SAMPLES
+    try:
+        max_bytes = float(config.get('history_max_mb', HISTORY_MAX_BYTES / MB)) * MB
+    except (TypeError, ValueError):
+        max_bytes = HISTORY_MAX_BYTES
+    return samples, max(int(max_bytes // (samples * SeriesRing.SAMPLE_BYTES)), 1)
+
+
+def record_history(rows, config):
+    """Append one sample per row and evict rings beyond the memory budget."""
+    samples, max_rings = history_settings(config)
+    now = time.time()
+    with _history_lock:
+        for key, _, _, proc_info in rows:
+            ring = _history.pop(key, None) or SeriesRing(samples)
+            jvm = proc_info.get('jvm')
+            ring.append(now, proc_info['cpu'], proc_info['memory'], jvm['heap_used'] if jvm else 0)
+            _history[key] = ring
+        while len(_history) > max_rings:
+            del _history[next(iter(_history))]
+
+
+def get_history(pid, since=None, until=None):
+    """Return the window of the newest ring recorded for pid, or None."""
+    with _history_lock:
+        rings = [ring for key, ring in _history.items() if key[0] == pid]
+        if not rings:
+            return None
+        return max(rings, key=SeriesRing.last).window(since, until)
+
+
+# Persistent metrics under ~/.gradik/metrics: raw samples plus 1-minute
+# and 1-hour min/avg/max rollups. Each tier is split into time segment
+# files, so retention deletes whole files and a query only opens the
+# segments overlapping its range. Samples are buffered in memory and
+# appended in batches.
+METRICS_DIR = CONFIG_DIR / 'metrics'
+METRICS_FLUSH_INTERVAL = 30.0  # seconds between batched appends
+METRICS_MAX_UNWRITTEN = 300.0  # wall-clock seconds before open blocks are written partially
+METRIC_FIELDS = ('cpu', 'rss', 'heap')
+# tier -> (bucket seconds, segment seconds, block seconds, default retention hours)
+# A block still being filled is written once it spans block seconds, or
+# as a partial block every METRICS_MAX_UNWRITTEN seconds, when the sampler
+# suspends and at exit. Open rollup buckets are saved to open.json then.
+METRIC_TIERS = {
+    'raw': (0, 3600, 600, 6),
+    '1m': (60, 86400, 3600, 7 * 24),
+    '1h': (3600, 30 * 86400, 6 * 3600, 365 * 24),
+}
+# A query uses the finest tier whose span covers the range: up to 1 hour
+# from raw samples, up to 6 hours from 1-minute rollups, else hourly
+METRIC_QUERY_SPANS = (('raw', 3600), ('1m', 6 * 3600), ('1h', None))
+
+
+# Series are stored Gorilla-style (Pelkonen et al., VLDB 2015): one block
+# per series of up to BLOCK_SAMPLES samples, with delta-of-delta
+# millisecond timestamps and XOR-compressed float64 values. The block
+# header carries its time range, so readers skip blocks outside a query
+# without decoding them.
+BLOCK_SAMPLES = 256
+# payload bytes, sample count, first / last ts (ms), series name bytes
+SERIES_BLOCK = struct.Struct('<IHqqH')
+# Delta-of-delta buckets: (prefix, prefix bits, value bits)
+DOD_BUCKETS = ((0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12), (0b1111, 4, 32))
+FLOAT_BITS = struct.Struct('<d')
+FLOAT_INT = struct.Struct('<Q')
+
+
+class BitWriter:
+    def __init__(self):
+        self.value = 0
+        self.bits = 0
+    
+    def write(self, value, n):
+        self.value = (self.value << n) | (value & ((1 << n) - 1))
+        self.bits += n
+    
+    def to_bytes(self):
+        pad = -self.bits % 8
+        return (self.value << pad).to_bytes((self.bits + pad) // 8, 'big')
+
+
+class BitReader:
+    def __init__(self, data):
+        # Reads of up to 64 bits come from a 9-byte window; pad the end
+        self.data = bytes(data) + bytes(9)
+        self.pos = 0
+    
+    def read(self, n):
+        pos = self.pos
+        self.pos = pos + n
+        window = int.from_bytes(self.data[pos >> 3:(pos >> 3) + 9], 'big')
+        return (window >> (72 - (pos & 7) - n)) & ((1 << n) - 1)
+
+
+def _float_bits(value):
+    return FLOAT_INT.unpack(FLOAT_BITS.pack(value))[0]
+
+
+def _bits_float(bits):
+    return FLOAT_BITS.unpack(FLOAT_INT.pack(bits))[0]
+
+
+def encode_series_block(samples):
+    """Encode [(ts_ms, v0, v1, ...), ...] into a block payload.
+    
+    The first timestamp goes in the block header; the payload starts with
+    the number of values per sample, then the first sample's values in
+    full, every later value as the XOR with its
+    predecessor: '0' when equal, '10' + bits when they fit the previous
+    leading/trailing zero window, else '11' + 5-bit leading zeros + 6-bit
+    length + bits.
+    """
+    writer = BitWriter()
+    prev_ts, prev_delta = samples[0][0], 0
+    prev = [_float_bits(v) for v in samples[0][1:]]
+    writer.write(len(prev), 8)
+    for bits in prev:
+        writer.write(bits, 64)
+    windows = [None] * len(prev)
+    
+    for sample in samples[1:]:
+        delta = sample[0] - prev_ts
+        dod = delta - prev_delta
+        prev_ts, prev_delta = sample[0], delta
+        if dod == 0:
+            writer.write(0, 1)
+        else:
+            for prefix, prefix_bits, value_bits in DOD_BUCKETS:
+                bias = (1 << (value_bits - 1)) - 1
+                if -bias <= dod <= bias + 1 or value_bits == 32:
+                    writer.write(prefix, prefix_bits)
+                    writer.write(dod + bias, value_bits)
+                    break
+        
+        for i, value in enumerate(sample[1:]):
+            bits = _float_bits(value)
+            xor = bits ^ prev[i]
+            prev[i] = bits
+            if not xor:
+                writer.write(0, 1)
+                continue
+            leading = min(64 - xor.bit_length(), 31)
+            trailing = (xor & -xor).bit_length() - 1
+            window = windows[i]
+            if window and leading >= window[0] and trailing >= window[1]:
+                writer.write(0b10, 2)
+                writer.write(xor >> window[1], 64 - window[0] - window[1])
+            else:
+                meaningful = 64 - leading - trailing
+                writer.write(0b11, 2)
+                writer.write(leading, 5)
+                writer.write(meaningful - 1, 6)
+                writer.write(xor >> trailing, meaningful)
+                windows[i] = (leading, trailing)
+    return writer.to_bytes()
+
+
+def decode_series_block(payload, count, first_ts):
+    """Decode a block payload back into [(ts_ms, v0, v1, ...), ...]."""
+    reader = BitReader(payload)
+    width = reader.read(8)
+    prev = [reader.read(64) for _ in range(width)]
+    windows = [None] * width
+    ts, delta = first_ts, 0
+    samples = [(ts,) + tuple(_bits_float(bits) for bits in prev)]
+    
+    for _ in range(count - 1):
+        if reader.read(1):
+            for _, _, value_bits in DOD_BUCKETS[:-1]:
+                if not reader.read(1):
+                    break
+            else:
+                value_bits = DOD_BUCKETS[-1][2]
+            delta += reader.read(value_bits) - ((1 << (value_bits - 1)) - 1)
+        ts += delta
+        
+        for i in range(width):
+            if reader.read(1):
+                if reader.read(1):
+                    leading = reader.read(5)
+                    meaningful = reader.read(6) + 1
+                    windows[i] = (leading, 64 - leading - meaningful)
+                leading, trailing = windows[i]
+                prev[i] ^= reader.read(64 - leading - trailing) << trailing
+        samples.append((ts,) + tuple(_bits_float(bits) for bits in prev))
+    return samples
+
+
+def write_series_block(f, name, samples):
+    payload = encode_series_block(samples)
+    name_bytes = name.encode()
+    f.write(SERIES_BLOCK.pack(len(payload), len(samples), samples[0][0], samples[-1][0], len(name_bytes)))
+    f.write(name_bytes)
+    f.write(payload)
+
+
+def read_series_blocks(f, start_ms=None, end_ms=None, series=None):
+    """Yield (name, samples) for the blocks of a stream overlapping the range.
+    
+    Other blocks are skipped by seeking past their payload undecoded. A
+    truncated block at the end (torn write) ends the stream.
+    """
+    while True:
+        header = f.read(SERIES_BLOCK.size)
+        if len(header) < SERIES_BLOCK.size:
+            return
+        length, count, first, last, name_length = SERIES_BLOCK.unpack(header)
+        name = f.read(name_length).decode('utf-8', 'replace')
+        if ((start_ms is not None and last < start_ms) or (end_ms is not None and first > end_ms)
+                or (series is not None and name != series)):
+            f.seek(length, 1)
+            continue
+        payload = f.read(length)
+        if len(payload) < length:
+            return
+        yield name, decode_series_block(payload, count, first)
+
+
+class MetricsStore:
+    """Metric tiers of series blocks, with in-memory rollup accumulators.
+    
+    Every tier is a sequence of series blocks (see encode_series_block).
+    Raw samples are (ts, cpu, rss, heap); rollup samples are (bucket, n,
+    cpu min/avg/max, rss min/avg/max, heap min/avg/max). Queries return
+    them as lines with the series name second.
+    """
+    
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        # (tier, series) -> samples of the block being filled
+        self._blocks = {}
+        # (segment path, series, samples) of closed blocks not written yet
+        self._closed = []
+        # (tier, series) -> [bucket, n, mins, sums, maxes]
+        self._open = {}
+        self._flushed = time.monotonic()
+        self._written = time.time()
+        self._pruned = 0.0
+        self._restored = False
+    
+    def _restore_open(self):
+        """Pick up the rollup buckets saved by the previous run, once."""
+        self._restored = True
+        try:
+            with open(self.directory / 'open.json') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, acc in saved.items():
+            tier, series = name.split('|', 1)
+            if tier in METRIC_TIERS and (tier, series) not in self._open:
+                self._open[(tier, series)] = acc
+    
+    def _save_open(self):
+        path = self.directory / 'open.json'
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            with open(tmp, 'w') as f:
+                json.dump({f'{tier}|{series}': acc for (tier, series), acc in self._open.items()}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+    
+    def add(self, ts, samples):
+        """Record {series: (cpu, rss, heap)} sampled at ts."""
+        with self._lock:
+            if not self._restored:
+                self._restore_open()
+            for series, values in samples.items():
+                self._append('raw', series, ts, values)
+                for tier, (bucket_seconds, _, _, _) in METRIC_TIERS.items():
+                    if bucket_seconds:
+                        self._accumulate(tier, series, ts - ts % bucket_seconds, values)
+    
+    def _append(self, tier, series, ts, values):
+        ts_ms = int(ts * 1000)
+        block = self._blocks.get((tier, series))
+        if block and (len(block) >= BLOCK_SAMPLES
+                      or ts_ms - block[0][0] >= METRIC_TIERS[tier][2] * 1000
+                      or self._segment(tier, ts) != self._segment(tier, block[0][0] / 1000)):
+            self._close_block(tier, series)
+            block = None
+        if block is None:
+            block = self._blocks[(tier, series)] = []
+        block.append((ts_ms,) + tuple(float(v) for v in values))
+    
+    def _close_block(self, tier, series):
+        block = self._blocks.pop((tier, series))
+        self._closed.append((self._segment(tier, block[0][0] / 1000), series, block))
+    
+    def _accumulate(self, tier, series, bucket, values):
+        acc = self._open.get((tier, series))
+        if acc is not None and acc[0] != bucket:
+            self._emit_rollup(tier, series, self._open.pop((tier, series)))
+            acc = None
+        if acc is None:
+            self._open[(tier, series)] = [bucket, 1, list(values), list(values), list(values)]
+            return
+        acc[1] += 1
+        for i, value in enumerate(values):
+            acc[2][i] = min(acc[2][i], value)
+            acc[3][i] += value
+            acc[4][i] = max(acc[4][i], value)
+    
+    def _emit_rollup(self, tier, series, acc):
+        bucket, n, mins, sums, maxes = acc
+        values = [n]
+        for i in range(len(METRIC_FIELDS)):
+            values += [mins[i], round(sums[i] / n, 2), maxes[i]]
+        self._append(tier, series, bucket, values)
+    
+    def close_idle(self, live):
+        """Close the rollup buckets and blocks of series no longer sampled."""
+        with self._lock:
+            for tier, series in [k for k in self._open if k[1] not in live]:
+                self._emit_rollup(tier, series, self._open.pop((tier, series)))
+            for tier, series in [k for k in self._blocks if k[1] not in live]:
+                self._close_block(tier, series)
+    
+    def _segment(self, tier, ts):
+        segment_seconds = METRIC_TIERS[tier][1]
+        return self.directory / tier / f'{int(ts - ts % segment_seconds)}.series'
+    
+    def maybe_flush(self, config):
+        if time.time() - self._written >= METRICS_MAX_UNWRITTEN:
+            self.flush(config, partial=True)
+        elif time.monotonic() - self._flushed >= METRICS_FLUSH_INTERVAL:
+            self.flush(config)
+    
+    def flush(self, config=None, final=False, partial=False):
+        """Append closed blocks, one write per segment.
+        
+        With partial or final (at exit), blocks still being filled are
+        written as partial blocks and open rollup buckets saved, so
+        nothing sampled so far is lost.
+        """
+        with self._lock:
+            if final or partial:
+                for tier, series in list(self._blocks):
+                    self._close_block(tier, series)
+                if self._restored:
+                    self._save_open()
+                self._written = time.time()
+            by_segment = {}
+            for path, series, block in self._closed:
+                by_segment.setdefault(path, []).append((series, block))
+            for path, blocks in by_segment.items():
+                try:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    buffer = io.BytesIO()
+                    for series, block in blocks:
+                        write_series_block(buffer, series, block)
+                    with open(path, 'ab') as f:
+                        f.write(buffer.getvalue())
+                except OSError as e:
+                    print(f"Error writing metrics: {e}")
+            self._closed = []
+            self._flushed = time.monotonic()
+        if time.monotonic() - self._pruned >= 3600:
+            self.prune(config if config is not None else current_config())
+    
+    def prune(self, config):
+        """Delete segments that ended before their tier's retention."""
+        self._pruned = time.monotonic()
+        retention = config.get('metrics_retention') or {}
+        now = time.time()
+        for tier, (_, segment_seconds, _, default_hours) in METRIC_TIERS.items():
+            try:
+                hours = float(retention.get(tier, default_hours))
+            except (TypeError, ValueError):
+                hours = default_hours
+            for start, path in self._segments(tier):
+                if start + segment_seconds < now - hours * 3600:
+                    path.unlink(missing_ok=True)
+    
+    def _segments(self, tier):
+        try:
+            entries = list(os.scandir(self.directory / tier))
+        except OSError:
+            return []
+        segments = []
+        for entry in entries:
+            stem = entry.name[:-len('.series')]
+            if entry.name.endswith('.series') and stem.isdigit():
+                segments.append((int(stem), Path(entry.path)))
+        return sorted(segments)
+    
+    def query(self, start, end, series=None, tier=None):
+        """Return (tier, {series: [line, ...]}) for lines in [start, end]."""
+        if tier is None:
+            tier = next(name for name, span in METRIC_QUERY_SPANS if span is None or end - start <= span)
+        bucket_seconds, segment_seconds, _, _ = METRIC_TIERS[tier]
+        # Rollup buckets overlapping the range count, not just those starting in it
+        start_ms, end_ms = (start - bucket_seconds) * 1000, end * 1000
+        
+        with self._lock:
+            blocks = []
+            for segment_start, path in self._segments(tier):
+                if segment_start + segment_seconds < start - bucket_seconds or segment_start > end:
+                    continue
+                try:
+                    with open(path, 'rb') as f:
+                        blocks.extend(read_series_blocks(f, start_ms, end_ms, series))
+                except OSError:
+                    continue
+            blocks += [(name, block) for path, name, block in self._closed if path.parent.name == tier]
+            blocks += [(name, block) for (block_tier, name), block in self._blocks.items() if block_tier == tier]
+        
+        result = {}
+        for name, samples in blocks:
+            if series is not None and name != series:
+                continue
+            for sample in samples:
+                if start_ms <= sample[0] <= end_ms:
+                    line = [sample[0] / 1000, name] + [
+                        value if isinstance(value, float) and not value.is_integer() else int(value)
+                        for value in sample[1:]]
+                    result.setdefault(name, []).append(line)
+        for lines in result.values():
+            lines.sort(key=lambda line: line[0])
+        return tier, result
+
+
+_metrics = MetricsStore(METRICS_DIR)
+
+
+def handle_sigterm(signum, frame):
+    """Flush buffered metrics and exit; gradik stop sends SIGTERM."""
+    _metrics.flush(current_config(), final=True)
+    sys.exit(0)
+
+
+# (pid, create_time) -> series name, kept for the life of the process
+_metric_series = {}
+
+
+def assign_metric_series(processes):
+    """Give every process with an identity a series name.
+    
+    The series of an identity is handed from a process to the one that
+    replaces it, so it continues across restarts. Processes running at the
+    same time with one identity (duplicate daemons) get identity#2, #3, ...
+    in start order, rather than being summed into one series.
+    """
+    live = {}
+    for procs in processes.values():
+        for proc_info in procs:
+            if proc_info.get('identity'):
+                live[(proc_info['pid'], proc_info.get('started'))] = proc_info['identity']
+    for key in [k for k, series in _metric_series.items()
+                if k not in live or series.split('#', 1)[0] != live[k]]:
+        del _metric_series[key]
+    taken = set(_metric_series.values())
+    for key in sorted((k for k in live if k not in _metric_series), key=lambda k: (k[1] or 0, k[0])):
+        series = live[key]
+        n = 1
+        while series in taken:
+            n += 1
+            series = f'{live[key]}#{n}'
+        _metric_series[key] = series
+        taken.add(series)
+
+
+def metric_series(proc_info):
+    """Series name a process is stored under: its logical identity, with a
+    #n suffix for concurrent duplicates (see assign_metric_series).
+    
+    None until the identity is known (its cwd is still being fetched).
+    """
+    return _metric_series.get((proc_info['pid'], proc_info.get('started')))
+
+
+def record_metrics(processes, config):
+    """Hand one scan's samples to the persistent store."""
+    if config.get('metrics_enabled') is False:
+        return
+    assign_metric_series(processes)
+    samples = {}
+    for procs in processes.values():
+        for proc_info in procs:
+            series = metric_series(proc_info)
+            if series is None:
+                continue
+            jvm = proc_info.get('jvm')
+            samples[series] = (proc_info['cpu'], proc_info['memory'], jvm['heap_used'] if jvm else 0)
+    _metrics.add(time.time(), samples)
+    _metrics.close_idle(samples)
+    _metrics.maybe_flush(config)
+
+
+# Time travel: status snapshots are persisted under ~/.gradik/snapshots as
+# zlib-compressed JSON records, a full keyframe every KEYFRAME_INTERVAL
+# seconds and a delta (spawned / exited rows, changed fields) for every
+# other scan. Each hourly segment starts with a keyframe, so segments can
+# be deleted independently; reading a past state seeks to the keyframe
+# before it and replays at most one interval of deltas.
+SNAPSHOTS_DIR = CONFIG_DIR / 'snapshots'
+SNAPSHOT_SEGMENT = 3600
+SNAPSHOT_RETENTION = 24  # hours
+KEYFRAME_INTERVAL = 300.0
+# kind (b'K' keyframe / b'D' delta), ts, payload bytes
+SNAPSHOT_RECORD = struct.Struct('<cdI')
+# Derived on read from 'started', so they do not churn the deltas
+SNAPSHOT_DERIVED = ('uptime',)
+
+
+def snapshot_state(data):
+    """Split a status payload into (meta, {'category/pid': row})."""
+    categories = {category['id'] for category in data['categories']}
+    meta = {k: v for k, v in data.items() if k not in categories}
+    rows = {}
+    for category in categories:
+        for row in data.get(category, []):
+            rows[f"{category}/{row['pid']}"] = {k: v for k, v in row.items() if k not in SNAPSHOT_DERIVED}
+    return meta, rows
+
+
+def snapshot_delta(prev, current):
+    """Return the delta that turns state prev into current."""
+    prev_meta, prev_rows = prev
+    meta, rows = current
+    changed = {}
+    for key, row in rows.items():
+        old = prev_rows.get(key)
+        if old is not None:
+            fields = {k: v for k, v in row.items() if old.get(k) != v}
+            removed = [k for k in old if k not in row]
+            if fields or removed:
+                changed[key] = {'set': fields, 'unset': removed} if removed else {'set': fields}
+    return {
+        'meta': {k: v for k, v in meta.items() if prev_meta.get(k) != v},
+        'meta_unset': [k for k in prev_meta if k not in meta],
+        'spawned': {key: row for key, row in rows.items() if key not in prev_rows},
+        'exited': [key for key in prev_rows if key not in rows],
+        'changed': changed
+    }
+
+
+def apply_snapshot_delta(state, delta):
+    meta, rows = state
+    meta.update(delta['meta'])
+    for k in delta['meta_unset']:
+        meta.pop(k, None)
+    for key in delta['exited']:
+        rows.pop(key, None)
+    rows.update(delta['spawned'])
+    for key, change in delta['changed'].items():
+        row = rows.setdefault(key, {})
+        row.update(change['set'])
+        for k in change.get('unset', ()):
+            row.pop(k, None)
+
+
+def status_from_state(state, at):
+    """Rebuild a status payload from (meta, rows) as of epoch seconds at."""
+    meta, rows = state
+    data = dict(meta)
+    for category in meta.get('categories', []):
+        data[category['id']] = []
+    for key, row in rows.items():
+        row = dict(row)
+        row['uptime'] = format_uptime(at - row['started']) if row.get('started') else ''
+        data.setdefault(key.rsplit('/', 1)[0], []).append(row)
+    return data
+
+
+class SnapshotLog:
+    """Append-only keyframe + delta log of status payloads."""
+    
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._state = None
+        self._keyframe_ts = 0.0
+        self._segment_path = None
+        self._pruned = 0.0
+        # Sorted (ts, path, offset) of every keyframe, and their ts for
+        # bisect; built on first read
+        self._keyframes = None
+        self._keyframe_times = None
+    
+    def _segment(self, ts):
+        return self.directory / f'{int(ts - ts % SNAPSHOT_SEGMENT)}.log'
+    
+    def record(self, ts, data, config):
+        if time.monotonic() - self._pruned >= 3600:
+            self.prune(config)
+        state = snapshot_state(data)
+        path = self._segment(ts)
+        keyframe = (self._state is None or path != self._segment_path
+                    or ts - self._keyframe_ts >= KEYFRAME_INTERVAL)
+        payload = state if keyframe else snapshot_delta(self._state, state)
+        body = zlib.compress(json.dumps(payload, separators=(',', ':')).encode())
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'ab') as f:
+                offset = f.tell()
+                f.write(SNAPSHOT_RECORD.pack(b'K' if keyframe else b'D', ts, len(body)) + body)
+        except OSError as e:
+            print(f"Error writing snapshot: {e}")
+            self._state = None  # start over with a keyframe
+            return
+        self._state = state
+        self._segment_path = path
+        if keyframe:
+            self._keyframe_ts = ts
+            with self._lock:
+                if self._keyframes is not None:
+                    self._keyframes.append((ts, path, offset))
+                    self._keyframe_times.append(ts)
+    
+    def _records(self, f):
+        """Yield (kind, ts, offset, length) per record header; callers read
+        or skip the payload before asking for the next one."""
+        while True:
+            offset = f.tell()
+            header = f.read(SNAPSHOT_RECORD.size)
+            if len(header) < SNAPSHOT_RECORD.size:
+                return
+            kind, ts, length = SNAPSHOT_RECORD.unpack(header)
+            yield kind, ts, offset, length
+    
+    def _index(self):
+        """Scan the record headers of all segments for keyframes."""
+        keyframes = []
+        for path in self.segments():
+            try:
+                with open(path, 'rb') as f:
+                    for kind, ts, offset, length in self._records(f):
+                        if kind == b'K':
+                            keyframes.append((ts, path, offset))
+                        f.seek(length, 1)
+            except OSError:
+                continue
+        return sorted(keyframes)
+    
+    def segments(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(self.directory / name for name in names
+                      if name.endswith('.log') and name[:-4].isdigit())
+    
+    def at(self, ts):
+        """Return (snapshot ts, status payload) of the last record at or before ts."""
+        with self._lock:
+            if self._keyframes is None:
+                self._keyframes = self._index()
+                self._keyframe_times = [k[0] for k in self._keyframes]
+            i = bisect_right(self._keyframe_times, ts)
+            if i == 0:
+                return None
+            _, path, offset = self._keyframes[i - 1]
+        
+        state = found = None
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for kind, record_ts, _, length in self._records(f):
+                    if record_ts > ts or (kind == b'K' and state is not None):
+                        break
+                    body = f.read(length)
+                    if len(body) < length:
+                        break  # still being written
+                    payload = json.loads(zlib.decompress(body))
+                    if kind == b'K':
+                        state = tuple(payload)
+                    else:
+                        apply_snapshot_delta(state, payload)
+                    found = record_ts
+        except (OSError, ValueError, zlib.error) as e:
+            print(f"Error reading snapshot: {e}")
+        if state is None:
+            return None
+        return found, status_from_state(state, found)
+    
+    def prune(self, config):
+        """Delete segments older than the snapshot retention."""
+        self._pruned = time.monotonic()
+        try:
+            hours = float(config.get('snapshot_retention', SNAPSHOT_RETENTION))
+        except (TypeError, ValueError):
+            hours = SNAPSHOT_RETENTION
+        cutoff = time.time() - hours * 3600
+        removed = False
+        for path in self.segments():
+            if int(path.stem) + SNAPSHOT_SEGMENT < cutoff:
+                path.unlink(missing_ok=True)
+                removed = True
+        if removed:
+            with self._lock:
+                self._keyframes = None
+
+
+_snapshot_log = SnapshotLog(SNAPSHOTS_DIR)
+
+
+def record_snapshot(data, config):
+    """Persist one status payload to the snapshot log."""
+    if config.get('snapshots_enabled') is not False:
+        _snapshot_log.record(time.time(), data, config)
+
+
+# Lifecycle events. Each scan is diffed against the previous one into
+# typed events (spawned, exited, killed, memory_threshold), appended as
+# JSON lines to a log under ~/.gradik/events that rotates by size. An
+# in-memory index of (ts, segment, offset), plus positions per pid and
+# category, answers queries with a bisect and a seek per event.
+EVENTS_DIR = CONFIG_DIR / 'events'
+EVENTS_SEGMENT_BYTES = 1024 * 1024
+EVENTS_KEEP_SEGMENTS = 10
+EVENT_MEMORY_THRESHOLDS = (1024 * MB, 2048 * MB)
+EVENT_HYSTERESIS = 0.95  # fall back below threshold * this to re-arm
+KILL_ATTRIBUTION = 60.0  # seconds a kill request explains an exit
+
+
+class EventLog:
+    """Append-only, size-rotated event log with a time / pid / category index."""
+    
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._index = None  # sorted (ts, path, offset)
+        self._times = None  # the ts of each index entry, for bisect
+        self._by_pid = {}
+        self._by_category = {}
+        self._path = None
+        self._seq = 0
+    
+    def _segments(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted((self.directory / name for name in names
+                       if name.endswith('.jsonl') and name[:-6].isdigit()),
+                      key=lambda path: int(path.stem))
+    
+    def _load(self):
+        """Build the index by reading every segment once."""
+        self._index, self._times, self._by_pid, self._by_category = [], [], {}, {}
+        for path in self._segments():
+            try:
+                with open(path, 'rb') as f:
+                    offset = 0
+                    for line in f:
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            event = None  # torn write
+                        if event:
+                            self._add_to_index(event, path, offset)
+                            self._seq = max(self._seq, event.get('id', 0))
+                        offset += len(line)
+            except OSError:
+                continue
+        segments = self._segments()
+        self._path = segments[-1] if segments else None
+    
+    def _add_to_index(self, event, path, offset):
+        position = len(self._index)
+        self._index.append((event['ts'], path, offset))
+        self._times.append(event['ts'])
+        self._by_pid.setdefault(event.get('pid'), []).append(position)
+        self._by_category.setdefault(event.get('category'), []).append(position)
+    
+    def append(self, events):
+        """Write events in one append, rotating the segment when full.
+        
+        Events are stored in time order; none may predate the previous batch.
+        """
+        if not events:
+            return
+        events = sorted(events, key=lambda event: event['ts'])
+        with self._lock:
+            if self._index is None:
+                self._load()
+            for event in events:
+                self._seq += 1
+                event['id'] = self._seq
+            try:
+                if self._path is None or self._path.stat().st_size >= EVENTS_SEGMENT_BYTES:
+                    self._rotate(events[0]['ts'])
+                with open(self._path, 'ab') as f:
+                    offset = f.tell()
+                    for event in events:
+                        line = (json.dumps(event, separators=(',', ':')) + '\n').encode()
+                        f.write(line)
+                        self._add_to_index(event, self._path, offset)
+                        offset += len(line)
+            except OSError as e:
+                print(f"Error writing events: {e}")
+    
+    def _rotate(self, ts):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path = self.directory / f'{int(ts * 1000)}.jsonl'
+        segments = self._segments()
+        if len(segments) >= EVENTS_KEEP_SEGMENTS:
+            removed = set(segments[:len(segments) - EVENTS_KEEP_SEGMENTS + 1])
+            for path in removed:
+                path.unlink(missing_ok=True)
+            self._trim(removed)
+    
+    def _trim(self, removed):
+        """Drop the index entries of deleted segments, which are the oldest."""
+        n = 0
+        while n < len(self._index) and self._index[n][1] in removed:
+            n += 1
+        if not n:
+            return
+        del self._index[:n], self._times[:n]
+        for by in (self._by_pid, self._by_category):
+            for key in list(by):
+                positions = by[key]
+                kept = [p - n for p in positions[bisect_left(positions, n):]]
+                if kept:
+                    by[key] = kept
+                else:
+                    del by[key]
+    
+    def query(self, since=None, until=None, category=None, pid=None, types=None, limit=500):
+        """Return matching events in time order, at most limit (the newest)."""
+        with self._lock:
+            if self._index is None:
+                self._load()
+            lo = bisect_left(self._times, since) if since is not None else 0
+            hi = bisect_right(self._times, until) if until is not None else len(self._times)
+            # Narrow with the most selective index; the rest is checked per event
+            subset = self._by_pid.get(pid, []) if pid is not None else \
+                self._by_category.get(category, []) if category is not None else None
+            if subset is None:
+                positions = range(lo, hi)
+            else:
+                positions = subset[bisect_left(subset, lo):bisect_left(subset, hi)]
+            entries = [self._index[p] for p in positions]
+        
+        events = []
+        handles = {}
+        try:
+            for _, path, offset in entries:
+                if path not in handles:
+                    handles[path] = open(path, 'rb')
+                f = handles[path]
+                f.seek(offset)
+                event = json.loads(f.readline())
+                if (category is None or event.get('category') == category) and \
+                        (pid is None or event.get('pid') == pid) and \
+                        (not types or event['type'] in types):
+                    events.append(event)
+        except (OSError, ValueError) as e:
+            print(f"Error reading events: {e}")
+        finally:
+            for f in handles.values():
+                f.close()
+        return events[-limit:] if limit else events
+
+
+_event_log = EventLog(EVENTS_DIR)
+# pid -> time of a kill request through the API
+_kill_requests = {}
+# Guards _kill_requests: requests land from Flask's threads
+_kill_lock = threading.Lock()
+# (pid, started) -> {'category', 'name', 'level'} of the previous scan
+_event_rows = None
+# ts of the previous scan: spawns and exits happened after it
+_event_scan_ts = None
+
+
+def event_memory_thresholds(config):
+    """Return the sorted memory thresholds in bytes, ignoring invalid entries."""
+    values = config.get('event_memory_thresholds')
+    thresholds = set()
+    if isinstance(values, (list, tuple)):
+        for value in values:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+            if value > 0:
+                thresholds.add(value)
+    return sorted(thresholds or EVENT_MEMORY_THRESHOLDS)
+
+
+def memory_level(level, memory, thresholds):
+    """Number of thresholds memory is above, with hysteresis on the way down."""
+    level = min(level, len(thresholds))  # the thresholds may have changed
+    while level < len(thresholds) and memory >= thresholds[level]:
+        level += 1
+    while level > 0 and memory < thresholds[level - 1] * EVENT_HYSTERESIS:
+        level -= 1
+    return level
+
+
+def lifecycle_events(data, config, now=None):
+    """Diff a status payload against the previous one into events.
+    
+    Spawns are dated by the process's start time. Exits are dated by the
+    scan that misses the process, except after a sampler suspend: then
+    the exit is only known to lie between the last scan that saw the
+    process ('ts') and this one ('until'), and is marked approximate.
+    """
+    global _event_rows, _event_scan_ts
+    
+    if now is None:
+        now = time.time()
+    last_scan = _event_scan_ts
+    after_gap = bool(_sampler_gap and last_scan is not None and _sampler_gap[1] > last_scan)
+    thresholds = event_memory_thresholds(config)
+    rows = {}
+    events = []
+    for category in (c['id'] for c in data['categories']):
+        for proc_info in data.get(category, []):
+            key = (proc_info['pid'], proc_info.get('started'))
+            prev = _event_rows.get(key) if _event_rows is not None else None
+            base = {'ts': now, 'category': category, 'pid': proc_info['pid'], 'name': proc_info['name'],
+                    'identity': proc_info.get('identity')}
+            if _event_rows is not None and prev is None:
+                # Not before the last scan, which keeps the log in time order
+                started = proc_info.get('started') or now
+                events.append(dict(base, ts=max(started, last_scan or started), type='spawned', started=started,
+                                   memory=proc_info['memory'], cwd=proc_info['cwd']))
+            level = memory_level(prev['level'] if prev else 0, proc_info['memory'], thresholds)
+            if prev and level != prev['level']:
+                threshold = thresholds[max(level, prev['level']) - 1]
+                events.append(dict(base, type='memory_threshold', threshold=threshold,
+                                   direction='up' if level > prev['level'] else 'down',
+                                   memory=proc_info['memory']))
+            rows[key] = {'category': category, 'name': proc_info['name'], 'level': level,
+                         'memory': proc_info['memory'], 'identity': proc_info.get('identity')}
+    
+    for key, prev in (_event_rows or {}).items():
+        if key in rows:
+            continue
+        with _kill_lock:
+            killed = now - _kill_requests.pop(key[0], float('-inf')) <= KILL_ATTRIBUTION
+        event = {'ts': now, 'category': prev['category'], 'pid': key[0], 'name': prev['name'],
+                 'identity': prev['identity'], 'type': 'killed' if killed else 'exited',
+                 'memory': prev['memory']}
+        if after_gap and not killed:
+            event.update(ts=last_scan, until=now, approximate=True)
+        events.append(event)
+    with _kill_lock:
+        for pid in [p for p, ts in _kill_requests.items() if now - ts > KILL_ATTRIBUTION]:
+            del _kill_requests[pid]
+    
+    _event_rows = rows
+    _event_scan_ts = now
+    return events
+
+
+def record_events(data, config, extra=()):
+    if config.get('events_enabled') is not False:
+        _event_log.append(lifecycle_events(data, config) + list(extra))
+
+
+# Alerts. The sampler evaluates them once per scan, so they exist without
+# an open dashboard and every tab shows the same ones. Each alert is a
+# small state machine keyed by kind and logical identity. It is raised when
+# its value crosses a threshold and cleared only once the value falls below
+# threshold * hysteresis, so a value hovering at a threshold does not flap.
+ALERT_DEFAULTS = {
+    'cpu_warning': 50,
+    'cpu_critical': 80,
+    'cpu_stuck': 85,          # CPU % that counts towards "stuck"
+    'stuck_seconds': 30,      # time spent above cpu_stuck
+    'mem_warning': 1024 * MB,
+    'mem_critical': 2048 * MB,
+    'total_mem_warning': 4096 * MB,
+    'idle_daemon_minutes': 30,
+    'leak_min_mb_per_hour': 50,    # growth that counts as a leak
+    'leak_min_r2': 0.8,            # how well a line must fit the growth
+    'leak_min_minutes': 30,        # observation before a process can be leaking
+    'leak_half_life_minutes': 60,  # weight of older samples halves this often
+    'leak_danger_hours': 1,        # danger when the limit is this close
+    'leak_rss_limits': {},         # category -> RSS limit in bytes, default mem_critical
+    'hysteresis': 0.9
+}
+IDLE_GUESS_MEMORY = 100 * MB  # daemons without registry state under this may be idle
+
+# alert id -> active alert
+_alerts = {}
+# alert key -> ts of the first of the consecutive samples above cpu_stuck
+_stuck_since = {}
+# ts of the previous evaluation, to spot sampler suspend gaps
+_alerts_evaluated = 0.0
+
+
+def alert_thresholds(config):
+    """Return the alert thresholds with valid config overrides applied."""
+    thresholds = dict(ALERT_DEFAULTS)
+    overrides = config.get('alerts')
+    if not isinstance(overrides, dict):
+        return thresholds
+    for key, default in ALERT_DEFAULTS.items():
+        if key not in overrides:
+            continue
+        if isinstance(default, dict):
+            limits = overrides[key] if isinstance(overrides[key], dict) else {}
+            thresholds[key] = {}
+            for category, limit in limits.items():
+                try:
+                    thresholds[key][category] = float(limit)
+                except (TypeError, ValueError):
+                    pass
+            continue
+        try:
+            thresholds[key] = float(overrides[key])
+        except (TypeError, ValueError):
+            pass
+    return thresholds
+
+
+def alert_level(level, value, warning, critical, hysteresis):
+    """Next level (None, 'warning' or 'danger') of a threshold alert."""
+    if critical is not None and (value > critical or level == 'danger' and value >= critical * hysteresis):
+        return 'danger'
+    if value > warning or level is not None and value >= warning * hysteresis:
+        return 'warning'
+    return None
+
+
+# Leak detection. Every tracked process keeps an exponentially weighted
+# least-squares line through its RSS and, for JVMs with perf counters, its
+# heap right after GCs (the retained set, without the garbage between
+# collections). A line is six running sums, so the cost per process is
+# constant however long it lives. A steep, steady slope raises a
+# "leaking" alert with the growth per hour and the time left until the
+# memory limit (mem_critical for RSS, the max heap for heap).
+LEAK_MIN_SAMPLES = 10
+
+
+class LinearTrend:
+    """Exponentially weighted least-squares line through (ts, value) samples.
+    
+    Samples fade with the given half-life (seconds), so the line follows
+    the recent trend. Time is kept in hours since the first sample.
+    """
+    
+    __slots__ = ('half_life', 'first', 'last', 'count', 'w', 'st', 'sy', 'stt', 'sty', 'syy')
+    
+    def __init__(self, half_life, ts):
+        self.half_life = half_life
+        self.first = self.last = ts
+        self.count = 0
+        self.w = self.st = self.sy = self.stt = self.sty = self.syy = 0.0
+    
+    def add(self, ts, value):
+        decay = 0.5 ** (max(ts - self.last, 0.0) / self.half_life)
+        t = (ts - self.first) / 3600
+        self.w = self.w * decay + 1.0
+        self.st = self.st * decay + t
+        self.sy = self.sy * decay + value
+        self.stt = self.stt * decay + t * t
+        self.sty = self.sty * decay + t * value
+        self.syy = self.syy * decay + value * value
+        self.last = ts
+        self.count += 1
+    
+    def fit(self):
+        """Return (slope per hour, r², fitted value at the last sample), or None."""
+        if self.count < 2:
+            return None
+        mean_t = self.st / self.w
+        mean_y = self.sy / self.w
+        var_t = self.stt / self.w - mean_t * mean_t
+        var_y = self.syy / self.w - mean_y * mean_y
+        cov = self.sty / self.w - mean_t * mean_y
+        if var_t <= 1e-9:
+            return None
+        slope = cov / var_t
+        r2 = min(cov * cov / (var_t * var_y), 1.0) if var_y > 0 else 0.0
+        return slope, r2, mean_y + slope * ((self.last - self.first) / 3600 - mean_t)
+
+
+# (pid, create_time) -> {'rss': LinearTrend, 'heap': LinearTrend or None, 'gc_count': int}
+_leak_trends = {}
+
+
+def update_leak_trends(data, config, now=None):
+    """Feed one scan's RSS and post-GC heap (in MB) to the per-process lines."""
+    if now is None:
+        now = time.time()
+    half_life = alert_thresholds(config)['leak_half_life_minutes'] * 60
+    seen = set()
+    for category in (c['id'] for c in data['categories']):
+        for proc_info in data.get(category, []):
+            key = (proc_info['pid'], proc_info.get('started'))
+            seen.add(key)
+            trends = _leak_trends.get(key)
+            if trends is None:
+                trends = _leak_trends[key] = {'rss': LinearTrend(half_life, now), 'heap': None, 'gc_count': None}
+            trends['rss'].add(now, proc_info['memory'] / MB)
+            jvm = proc_info.get('jvm')
+            if jvm:
+                # Only samples taken after a collection show the retained heap
+                if trends['gc_count'] is not None and jvm['gc_count'] > trends['gc_count']:
+                    if trends['heap'] is None:
+                        trends['heap'] = LinearTrend(half_life, now)
+                    trends['heap'].add(now, jvm['heap_used'] / MB)
+                trends['gc_count'] = jvm['gc_count']
+    for key in [k for k in _leak_trends if k not in seen]:
+        del _leak_trends[key]
+
+
+def leak_estimate(category, proc_info, t, active=False, now=None):
+    """Worst leaking series of a process as a dict, or None.
+    
+    With active set (the alert is already raised), the slope and fit only
+    need to stay above their minimums times the hysteresis factor.
+    hours_to_limit is None when there is no limit or the value is already
+    past it (Android Studio routinely sits above mem_critical).
+    """
+    if now is None:
+        now = time.time()
+    trends = _leak_trends.get((proc_info['pid'], proc_info.get('started')))
+    if trends is None:
+        return None
+    slack = t['hysteresis'] if active else 1.0
+    jvm = proc_info.get('jvm')
+    worst = None
+    rss_limit = (t['leak_rss_limits'] or {}).get(category, t['mem_critical'])
+    for metric, limit in (('rss', rss_limit), ('heap', jvm['heap_max'] if jvm else 0)):
+        trend = trends[metric]
+        if trend is None or trend.count < LEAK_MIN_SAMPLES or now - trend.first < t['leak_min_minutes'] * 60:
+            continue
+        fit = trend.fit()
+        if fit is None:
+            continue
+        slope, r2, value = fit
+        if slope < t['leak_min_mb_per_hour'] * slack or r2 < t['leak_min_r2'] * slack:
+            continue
+        if worst is None or slope > worst['mb_per_hour']:
+            worst = {
+                'metric': metric,
+                'mb_per_hour': round(slope, 1),
+                'r2': round(r2, 3),
+                'limit': limit,
+                'hours_to_limit': round((limit / MB - value) / slope, 2) if limit and value < limit / MB else None,
+                'past_limit': bool(limit) and value >= limit / MB
+            }
+    return worst
+
+
+def evaluate_alerts(data, config, now=None):
+    """Advance the alert state machines by one status payload.
+    
+    Returns (active alerts, events for alerts raised, changed or cleared).
+    Processes sharing a logical identity are judged by the worst of them.
+    """
+    global _alerts_evaluated
+    
+    if now is None:
+        now = time.time()
+    t = alert_thresholds(config)
+    hysteresis = t['hysteresis']
+    found = {}
+    update_leak_trends(data, config, now)
+    # High CPU before the sampler slept says nothing about the time after
+    if _sampler_gap and _sampler_gap[1] > _alerts_evaluated:
+        _stuck_since.clear()
+    _alerts_evaluated = now
+    
+    def level_of(alert_id):
+        alert = _alerts.get(alert_id)
+        return alert['level'] if alert else None
+    
+    def alert(kind, key, level, message, category=None, proc_info=None, value=None):
+        found[f'{kind}-{key}'] = {
+            'kind': kind, 'key': key, 'level': level, 'message': message, 'value': value,
+            'category': category,
+            'pid': proc_info['pid'] if proc_info else None,
+            'name': proc_info['name'] if proc_info else None,
+            'identity': proc_info.get('identity') if proc_info else None
+        }
+    
+    level = alert_level(level_of('total-mem'), data['total_memory'], t['total_mem_warning'], None, hysteresis)
+    if level:
+        alert('total', 'mem', level, f"High total memory: {format_bytes(data['total_memory'])}",
+              value=data['total_memory'])
+    
+    groups = {}
+    for category in (c['id'] for c in data['categories']):
+        for proc_info in data.get(category, []):
+            key = proc_info.get('identity') or str(proc_info['pid'])
+            groups.setdefault(key, []).append((category, proc_info))
+    
+    for key, procs in groups.items():
+        category, busiest = max(procs, key=lambda p: p[1]['cpu'])
+        label = f"{busiest['name']} (PID {busiest['pid']})"
+        
+        # Stuck: high CPU in every scan for stuck_seconds
+        if busiest['cpu'] > t['cpu_stuck']:
+            _stuck_since.setdefault(key, now)
+        elif level_of(f'stuck-{key}') is None or busiest['cpu'] < t['cpu_stuck'] * hysteresis:
+            _stuck_since.pop(key, None)
+        first = _stuck_since.get(key)
+        if first is not None and now - first >= t['stuck_seconds']:
+            alert('stuck', key, 'danger', f"🔄 STUCK? {label} - High CPU for {format_uptime(now - first)}+",
+                  category, busiest, busiest['cpu'])
+        else:
+            # Idle daemon: exact from the Gradle daemon registry when known,
+            # otherwise guessed from uptime, CPU and memory (Kotlin daemons)
+            for idle_category, proc_info in procs:
+                idle_label = f"{proc_info['name']} (PID {proc_info['pid']})"
+                if proc_info.get('daemon'):
+                    minutes = proc_info['daemon']['idle_seconds'] // 60
+                    if proc_info['daemon']['state'] == 'Idle' and minutes > t['idle_daemon_minutes']:
+                        alert('idle', key, 'warning', f"💤 IDLE: {idle_label} - idle for {minutes}m",
+                              idle_category, proc_info, minutes)
+                        break
+                elif 'Daemon' in proc_info['name'] and proc_info.get('started'):
+                    uptime = now - proc_info['started']
+                    if uptime > t['idle_daemon_minutes'] * 60 and proc_info['cpu'] < 1 \
+                            and proc_info['memory'] < IDLE_GUESS_MEMORY:
+                        alert('idle', key, 'warning',
+                              f"💤 IDLE: {idle_label} - {format_uptime(uptime)} with no activity",
+                              idle_category, proc_info, int(uptime // 60))
+                        break
+            
+            level = alert_level(level_of(f'cpu-{key}'), busiest['cpu'], t['cpu_warning'], t['cpu_critical'], hysteresis)
+            if level:
+                alert('cpu', key, level, f"{label} CPU: {busiest['cpu']:.1f}%", category, busiest, busiest['cpu'])
+        
+        # Kotlin daemons whose Gradle clients are gone
+        for orphan_category, proc_info in procs:
+            if proc_info.get('kotlin_daemon') and proc_info['kotlin_daemon']['orphan']:
+                alert('orphan', key, 'warning',
+                      f"👻 ORPHAN: {proc_info['name']} (PID {proc_info['pid']}) - no client left, "
+                      f"holding {format_bytes(proc_info['memory'])}", orphan_category, proc_info, proc_info['memory'])
+                break
+        
+        category, largest = max(procs, key=lambda p: p[1]['memory'])
+        level = alert_level(level_of(f'mem-{key}'), largest['memory'], t['mem_warning'], t['mem_critical'], hysteresis)
+        if level:
+            alert('mem', key, level, f"{largest['name']} (PID {largest['pid']}) RAM: {format_bytes(largest['memory'])}",
+                  category, largest, largest['memory'])
+        
+        # Steady memory growth from the streaming regression
+        active = level_of(f'leak-{key}') is not None
+        leaks = [(leak_estimate(leak_category, proc_info, t, active, now), leak_category, proc_info)
+                 for leak_category, proc_info in procs]
+        leaks = [leak for leak in leaks if leak[0]]
+        if leaks:
+            leak, leak_category, proc_info = max(leaks, key=lambda l: l[0]['mb_per_hour'])
+            hours = leak['hours_to_limit']
+            outlook = f", {format_uptime(hours * 3600)} to {format_bytes(leak['limit'])}" if hours is not None else ''
+            # Danger near the limit; as with thresholds, leaving it needs a
+            # margin, and a leak that reached its limit stays danger
+            danger_hours = t['leak_danger_hours']
+            was_danger = level_of(f'leak-{key}') == 'danger'
+            if was_danger:
+                danger_hours /= hysteresis
+            level = 'danger' if (hours is not None and hours <= danger_hours
+                                 or was_danger and leak['past_limit']) else 'warning'
+            alert('leak', key, level,
+                  f"📈 LEAKING? {proc_info['name']} (PID {proc_info['pid']}) - "
+                  f"{'RSS' if leak['metric'] == 'rss' else 'heap after GC'} +{leak['mb_per_hour']:.0f} MB/h{outlook}",
+                  leak_category, proc_info, leak)
+    
+    for key in [k for k in _stuck_since if k not in groups]:
+        del _stuck_since[key]
+    
+    events = []
+    for alert_id, current in found.items():
+        previous = _alerts.get(alert_id)
+        current['id'] = alert_id
+        current['since'] = previous['since'] if previous else now
+        if previous is None or previous['level'] != current['level']:
+            events.append(alert_event(now, current, 'raised' if previous is None else 'changed'))
+    for alert_id, previous in _alerts.items():
+        if alert_id not in found:
+            events.append(alert_event(now, previous, 'cleared'))
+    _alerts.clear()
+    _alerts.update(found)
+    return sorted(found.values(), key=lambda a: (a['level'] != 'danger', a['since'])), events
+
+
+def alert_event(ts, alert, state):
+    return {'ts': ts, 'type': 'alert', 'state': state, 'category': alert['category'], 'pid': alert['pid'],
+            'name': alert['name'], 'identity': alert['identity'], 'alert': alert['id'],
+            'level': alert['level'], 'message': alert['message']}
+
+
+CPU_COUNT = psutil.cpu_count() or 1
+
+# Previous cpu_times per process: (pid, create_time) -> (user, system, monotonic)
+_cpu_samples = {}
+
+
+def cpu_rates(samples, key, user, system, now=None):
+    """Return CPU rates for key since its previous sample, and record this one.
+    
+    Rates are percentages: 'cpu_user' / 'cpu_system' / 'cpu' where 100 means
+    one full core, and 'cpu_norm' scaled to the whole machine (0-100).
+    The first sample of a process has no delta and reports zeros.
+    """
+    if now is None:
+        now = time.monotonic()
+    prev = samples.get(key)
+    samples[key] = (user, system, now)
+    user_rate = system_rate = 0.0
+    if prev and now > prev[2]:
+        elapsed = now - prev[2]
+        user_rate = max(user - prev[0], 0.0) / elapsed * 100
+        system_rate = max(system - prev[1], 0.0) / elapsed * 100
+    total = user_rate + system_rate
+    return {
+        'cpu': round(total, 1),
+        'cpu_user': round(user_rate, 1),
+        'cpu_system': round(system_rate, 1),
+        'cpu_norm': round(total / CPU_COUNT, 1)
+    }
+
+
+# Display names of unclassified descendants: (pid, create_time) -> name
+_tree_names = {}
+# Rows that head a tree of their own instead of rolling up into a tracked
+# ancestor: daemons, IDEs, emulators and custom categories. Workers and
+# helpers (Gradle workers, ADB, file watchers, other Java) roll up.
+TREE_ROOT_CATEGORIES = ('emulator', 'ide')
+TREE_ROOT_NAMES = ('GradleDaemon', 'KotlinCompileDaemon', 'Kotlin Daemon', 'Android Studio')
+
+
+def is_tree_root(category, proc_info):
+    return (category in TREE_ROOT_CATEGORIES or category not in BUILTIN_CATEGORIES
+            or proc_info['name'].startswith(TREE_ROOT_NAMES))
+
+
+def build_process_trees(rows, parents, handles, collector):
+    """Roll tracked processes up into their top-level tracked ancestor.
+    
+    rows are the (key, handle, category, proc_info) of matched processes,
+    parents maps pid -> ppid for every process, handles maps pid ->
+    (key, handle). A row is top-level when none of its ancestors is a
+    tracked row, when it is a named daemon or IDE (TREE_ROOT_NAMES), or
+    when it is of a root category (see is_tree_root) other than its
+    nearest tracked ancestor's: a Gradle daemon stays its own root under
+    Android Studio or the gradlew client that started it, QEMU under the
+    emulator launcher does not. Rollups stop at top-level rows, so nothing is
+    counted in two trees. Top-level rows with descendants get a 'tree' summary
+    (descendant count, total memory and cpu including their own);
+    descendant rows get the 'root' pid. Returns {root pid: nested tree}
+    for the subtree endpoint.
+    """
+    tracked = {proc_info['pid']: (category, proc_info) for _, _, category, proc_info in rows}
+    children = {}
+    for pid, ppid in parents.items():
+        if ppid != pid:
+            children.setdefault(ppid, []).append(pid)
+    
+    def top_level(pid):
+        category, proc_info = tracked[pid]
+        seen = {pid}
+        ppid = parents.get(pid)
+        while ppid and ppid not in seen:
+            if ppid in tracked:
+                if proc_info['name'].startswith(TREE_ROOT_NAMES):
+                    return True
+                return is_tree_root(category, proc_info) and tracked[ppid][0] != category
+            seen.add(ppid)
+            ppid = parents.get(ppid)
+        return True
+    
+    roots = {pid for pid in tracked if top_level(pid)}
+    
+    def node(pid, root):
+        if pid in tracked:
+            category, proc_info = tracked[pid]
+            if pid != root:
+                proc_info['root'] = root
+            name, memory, cpu = proc_info['name'], proc_info['memory'], proc_info['cpu']
+        else:
+            category = None
+            key, handle = handles[pid]
+            try:
+                details = collector.read_details(handle)
+                if key not in _tree_names:
+                    _tree_names[key] = collector.read_identity(handle)[0] or str(pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                return None
+            name = _tree_names[key]
+            memory = details['memory']
+            cpu = cpu_rates(_cpu_samples, key, details['cpu_user'], details['cpu_system'])['cpu']
+        kids = [n for n in (node(child, root) for child in sorted(children.get(pid, []))
+                            if child not in roots) if n]
+        return {'pid': pid, 'name': name, 'category': category,
+                'memory': memory, 'cpu': cpu, 'children': kids}
+    
+    def totals(tree):
+        count, memory, cpu = 0, tree['memory'], tree['cpu']
+        for child in tree['children']:
+            c, m, u = totals(child)
+            count, memory, cpu = count + 1 + c, memory + m, cpu + u
+        return count, memory, cpu
+    
+    trees = {}
+    for pid, (category, proc_info) in tracked.items():
+        if pid not in roots or not children.get(pid):
+            continue
+        tree = node(pid, pid)
+        count, memory, cpu = totals(tree)
+        if count:
+            proc_info['tree'] = {'descendants': count, 'memory': memory, 'cpu': round(cpu, 1)}
+            trees[pid] = tree
+    return trees
+
+
+def get_all_processes(scan_stats=None, collector=None, trees=None):
+    """Get all relevant processes from the active collector.
+    
+    The scan runs in two stages: a cheap pass over every process that
+    classifies it (from the memo, or from name and cmdline on first sight),
+    then a second pass that fetches the expensive attributes (cwd, memory,
+    cpu, ...) for matches only. If scan_stats is a dict, it is filled with
+    per-stage counts; if trees is a dict, it is filled with the process
+    trees of top-level tracked processes (see build_process_trees).
+    """
+    global _classify_hits, _classify_misses
+    
+    if collector is None:
+        collector = get_collector()
+    
+    processes = {category: [] for category in _rule_matcher.categories}
+    
+    scanned = 0
+    hits = 0
+    matched = []
+    seen = set()
+    stale = {}
+    parents = {}
+    handles = {}
+    
+    try:
+        # Stage 1: classify from the memo, or from name + cmdline on a miss
+        for pid, create_time, ppid, handle in collector.list_processes():
+            scanned += 1
+            try:
+                key = (pid, create_time)
+                seen.add(key)
+                parents[pid] = ppid
+                handles[pid] = (key, handle)
+                exec_name = collector.exec_name(handle)
+                cached = _classify_cache.get(key)
+                if cached is not None and cached[0] == exec_name:
+                    hits += 1
+                    classified = cached[1]
+                else:
+                    proc_name, cmdline = collector.read_identity(handle)
+                    classified = classify_process(proc_name, cmdline)
+                    _classify_cache[key] = (exec_name, classified)
+                
+                if classified is not None:
+                    matched.append((pid, handle, classified))
+                    
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        
+        # Forget processes that are gone
+        for key in [k for k in _classify_cache if k not in seen]:
+            del _classify_cache[key]
+        for key in [k for k in _cpu_samples if k not in seen]:
+            del _cpu_samples[key]
+        with _slow_lock:
+            for slot in [s for s in _slow_values if s[0] not in seen]:
+                del _slow_values[slot]
+        for key in [k for k in _tree_names if k not in seen]:
+            del _tree_names[key]
+        for key in [k for k in _daemon_args if k not in seen]:
+            del _daemon_args[key]
+        for key in [k for k in _identities if k not in seen]:
+            del _identities[key]
+        prune_hsperf_readers(seen)
+        
+        # Stage 2: expensive attributes for relevant processes only
+        now = datetime.now().timestamp()
+        rows = []
+        for pid, handle, (category, name, heap_size) in matched:
+            try:
+                details = collector.read_details(handle)
+                create_time = details['create_time']
+                rates = cpu_rates(_cpu_samples, (pid, create_time),
+                                  details['cpu_user'], details['cpu_system'])
+                
+                # Calculate uptime
+                uptime_seconds = now - create_time if create_time else 0
+                uptime = format_uptime(uptime_seconds)
+                
+                proc_info = {
+                    'pid': pid,
+                    'name': name,
+                    'memory': details['memory'],
+                    'user': details['username'] or 'unknown',
+                    'uptime': uptime,
+                    'cwd': '',
+                    'heap': heap_size,
+                    'started': create_time
+                }
+                proc_info.update(rates)
+                
+                # Compatibility key of Gradle daemons, from the cmdline once
+                if category == 'gradle' and name.startswith('GradleDaemon'):
+                    key = (pid, create_time)
+                    if key not in _daemon_args:
+                        _daemon_args[key] = parse_daemon_cmdline(collector.read_identity(handle)[1])
+                    proc_info['compat'] = compat_key(_daemon_args[key])
+                
+                rows.append(((pid, create_time), handle, category, proc_info))
+                
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                pass
+        
+        # Stage 3: slow attributes (cwd, uss) in parallel, each with a deadline
+        attrs = ['cwd'] + (['uss'] if current_config().get('collect_uss') else [])
+        slow, stale = fetch_slow_attrs(collector, [(key, handle) for key, handle, _, _ in rows], attrs)
+        home = os.path.expanduser('~')
+        daemons = get_daemon_states() if any(row[2] == 'gradle' for row in rows) else {}
+        for key, handle, category, proc_info in rows:
+            values = slow[key]
+            
+            # Get working directory
+            cwd = values['cwd'] or ''
+            if cwd.startswith(home):
+                cwd = '~' + cwd[len(home):]
+            proc_info['cwd'] = cwd
+            if 'uss' in values:
+                proc_info['uss'] = values['uss'] or 0
+            if key in stale:
+                proc_info['stale'] = stale[key]
+            
+            # Logical identity, once the cwd it includes is known
+            if key in _identities or values['cwd'] is not None or 'cwd' not in stale.get(key, ()):
+                proc_info['identity'] = process_identity(
+                    key, category, proc_info, lambda: collector.read_identity(handle)[1])
+            
+            # Heap and GC counters for Gradle / Kotlin JVMs
+            if category in JVM_COUNTER_CATEGORIES:
+                jvm = get_jvm_stats(key, proc_info['user'])
+                if jvm:
+                    proc_info['jvm'] = jvm
+            
+            # Exact busy / idle state of Gradle daemons from their registry
+            if category == 'gradle' and proc_info['pid'] in daemons:
+                daemon = daemons[proc_info['pid']]
+                proc_info['daemon'] = {
+                    'state': daemon['state'],
+                    'idle_seconds': int(max(now - daemon['last_busy'], 0)) if daemon['state'] == 'Idle' else 0
+                }
+            
+            processes[category].append(proc_info)
+        
+        update_identities(rows)
+        record_history(rows, current_config())
+        
+        # Stage 4: link Kotlin daemons to the Gradle daemons they serve
+        link_kotlin_daemons(rows, parents)
+        
+        # Stage 5: roll workers and helpers up into their daemon / IDE
+        if trees is not None:
+            trees.update(build_process_trees(rows, parents, handles, collector))
+        
+    except Exception as e:
+        print(f"Error getting processes: {e}")
+    
+    _classify_hits += hits
+    _classify_misses += scanned - hits
+    
+    if scan_stats is not None:
+        scan_stats['collector'] = collector.name
+        scan_stats['scanned'] = scanned
+        scan_stats['classified'] = scanned - hits
+        scan_stats['matched'] = len(matched)
+        scan_stats['stale'] = sum(len(attrs) for attrs in stale.values())
+        scan_stats['cache'] = get_classify_stats()
+    
+    return processes
+
+
+_app_cpu_samples = {}
+
+
+def get_app_stats():
+    """Get Gradik app's own resource usage.
+    
+    CPU is the rate since the previous call (one sampler cycle), so this
+    never blocks.
+    """
+    try:
+        proc = psutil.Process(APP_PID)
+        with proc.oneshot():
+            cpu_times = proc.cpu_times()
+            memory = proc.memory_info().rss
+        rates = cpu_rates(_app_cpu_samples, APP_PID, cpu_times.user, cpu_times.system)
+        uptime_seconds = (datetime.now() - APP_START_TIME).total_seconds()
+        
+        return {
+            'pid': APP_PID,
+            'cpu': rates['cpu'],
+            'memory': memory,
+            'uptime': format_uptime(uptime_seconds)
+        }
+    except:
+        return {
+            'pid': APP_PID,
+            'cpu': 0,
+            'memory': 0,
+            'uptime': '0s'
+        }
+
+
+# Background sampler - owns the scan cadence so /api/status cost does not
+# scale with the number of open dashboards.
+SAMPLE_INTERVAL = 5.0  # seconds between scans when the interval is not adaptive
+SNAPSHOT_WAIT_TIMEOUT = 10.0  # max seconds a request waits for the first scan
+
+# Demand-driven: the sampler suspends once no client has asked for data
+# for client_keepalive seconds, unless sample_always is set.
+CLIENT_KEEPALIVE = 120.0
+
+_snapshot = None
+_snapshot_cond = threading.Condition()
+_sampler_wake = threading.Event()
+_sampler_thread = None
+_sampler_lock = threading.Lock()
+_sampler_suspended = False
+_sampler_gap = None  # (ts suspended, ts resumed) of the last suspend
+_last_client_seen = time.monotonic()
+
+
+def build_snapshot(seq):
+    """Run one full scan and return a new snapshot dict."""
+    scan_stats = {}
+    trees = {}
+    scan_start = time.monotonic()
+    processes = get_all_processes(scan_stats, trees=trees)
+    scan_stats['duration_ms'] = round((time.monotonic() - scan_start) * 1000, 1)
+    daemons = analyze_daemons(processes)
+    record_jvm_peaks(processes)
+    record_test_runs(processes, trees)
+    record_metrics(processes, current_config())
+    app_stats = get_app_stats()
+    
+    total_memory = sum(p['memory'] for procs in processes.values() for p in procs)
+    
+    data = dict(processes)
+    data.update({
+        'categories': [dict(meta, id=category_id, builtin=category_id in BUILTIN_CATEGORIES)
+                       for category_id, meta in _rule_matcher.categories.items()],
+        'total_memory': total_memory,
+        'app': app_stats,
+        'scan': scan_stats,
+        'timestamp': datetime.now().isoformat()
+    })
+    data['alerts'], alert_events = evaluate_alerts(data, current_config())
+    data['thresholds'] = alert_thresholds(current_config())
+    record_snapshot(data, current_config())
+    record_events(data, current_config(), alert_events)
+    return {
+        'seq': seq,
+        'monotonic': time.monotonic(),
+        'data': data,
+        'trees': trees,
+        'daemons': daemons,
+        'jvmargs': jvmargs_advice(current_config()),
+        'workers': workers_advice(current_config()),
+        'identities': get_identities()
+    }
+
+
+# Adaptive cadence: scan every sample_interval_min seconds while a build
+# is running, and back off exponentially to sample_interval_max when idle.
+SAMPLING_DEFAULTS = {
+    'sample_interval_min': 1.0,     # seconds, while gradle/kotlin are busy
+    'sample_interval_max': 60.0,    # seconds, when everything is idle
+    'sample_backoff': 2.0,          # interval multiplier per idle cycle
+    'sample_active_cpu': 10.0,      # % of one core that counts as busy
+}
+ACTIVE_CATEGORIES = ('gradle', 'kotlin')
+
+
+def sampling_settings(config):
+    """Return the adaptive sampling settings with config overrides applied."""
+    settings = dict(SAMPLING_DEFAULTS)
+    for key in SAMPLING_DEFAULTS:
+        try:
+            settings[key] = float(config.get(key, settings[key]))
+        except (TypeError, ValueError):
+            pass
+    settings['sample_interval_max'] = max(settings['sample_interval_max'], settings['sample_interval_min'])
+    return settings
+
+
+def next_interval(interval, data, prev_data, settings):
+    """Return (next interval, active) for the sampler.
+    
+    Builds are active when any gradle/kotlin process is above the CPU
+    threshold, a Gradle daemon is Busy in its registry, or a new one
+    appeared since the previous snapshot.
+    """
+    pids = {p['pid'] for c in ACTIVE_CATEGORIES for p in data.get(c, [])}
+    prev_pids = {p['pid'] for c in ACTIVE_CATEGORIES for p in prev_data.get(c, [])} if prev_data else pids
+    busy = any(p['cpu'] >= settings['sample_active_cpu'] or p.get('daemon', {}).get('state') == 'Busy'
+               for c in ACTIVE_CATEGORIES for p in data.get(c, []))
+    if busy or (pids - prev_pids):
+        return settings['sample_interval_min'], True
+    backed_off = max(interval, settings['sample_interval_min']) * max(settings['sample_backoff'], 1.0)
+    return min(backed_off, settings['sample_interval_max']), False
+
+
+def publish_snapshot(snapshot):
+    """Swap in a new snapshot. Published snapshots are never mutated."""
+    global _snapshot
+    with _snapshot_cond:
+        _snapshot = snapshot
+        _snapshot_cond.notify_all()
+
+
+def client_keepalive(config):
+    try:
+        return float(config.get('client_keepalive', CLIENT_KEEPALIVE))
+    except (TypeError, ValueError):
+        return CLIENT_KEEPALIVE
+
+
+def sampler_wanted(config):
+    """Whether the sampler should keep scanning."""
+    if config.get('sample_always'):
+        return True
+    return time.monotonic() - _last_client_seen <= client_keepalive(config)
+
+
+def note_client():
+    """Record client demand; wakes a suspended sampler.
+    
+    Returns True if the latest snapshot should not be served as is: there
+    is none yet, or the sampler was asleep and it predates the demand.
+    """
+    global _last_client_seen
+    _last_client_seen = time.monotonic()
+    start_sampler()
+    snapshot = _snapshot
+    if snapshot is None:
+        return True
+    stale = time.monotonic() - snapshot['monotonic'] > client_keepalive(current_config())
+    if _sampler_suspended or stale:
+        _sampler_wake.set()
+        return True
+    return False
+
+
+def get_snapshot(timeout=SNAPSHOT_WAIT_TIMEOUT):
+    """Return the latest snapshot for a client request.
+    
+    After a quiet period this triggers an immediate scan and waits for it
+    rather than serving stale data.
+    """
+    snapshot = _snapshot
+    if note_client():
+        with _snapshot_cond:
+            _snapshot_cond.wait_for(lambda: _snapshot is not snapshot, timeout)
+    return _snapshot
+
+
+def request_sample():
+    """Ask the sampler to scan now instead of waiting for the next tick."""
+    _sampler_wake.set()
+
+
+def _sampler_loop():
+    global _sampler_suspended, _sampler_gap
+    seq = 0
+    interval = None
+    prev_data = None
+    while True:
+        config = current_config()
+        if not sampler_wanted(config):
+            # Nobody is watching: write what is buffered, then sleep until
+            # a client shows up
+            _metrics.flush(config, partial=True)
+            _sampler_suspended = True
+            suspended = time.time()
+            _sampler_wake.clear()
+            if not sampler_wanted(config):
+                _sampler_wake.wait()
+                _sampler_gap = (suspended, time.time())
+            _sampler_suspended = False
+            _sampler_wake.clear()
+            interval = None
+            prev_data = None
+            continue
+        
+        seq += 1
+        try:
+            update_rule_matcher(config)
+            snapshot = build_snapshot(seq)
+            settings = sampling_settings(config)
+            if interval is None:
+                interval = settings['sample_interval_min']
+            interval, active = next_interval(interval, snapshot['data'], prev_data, settings)
+            snapshot['data']['sampler'] = {'interval': interval, 'active': active}
+            prev_data = snapshot['data']
+            publish_snapshot(snapshot)
+        except Exception as e:
+            print(f"Error sampling processes: {e}")
+        _sampler_wake.wait(interval or SAMPLE_INTERVAL)
+        _sampler_wake.clear()
+
+
+def start_sampler():
+    """Start the background sampler thread (idempotent)."""
+    global _sampler_thread
+    with _sampler_lock:
+        if _sampler_thread is None or not _sampler_thread.is_alive():
+            if _sampler_thread is None:
+                # Only a process that samples has metrics to write at exit
+                atexit.register(_metrics.flush, final=True)
+            _sampler_thread = threading.Thread(target=_sampler_loop, name='gradik-sampler', daemon=True)
+            _sampler_thread.start()
+
+
+@app.route('/')
+def index():
+    return render_template_string(HTML_TEMPLATE)
+
+
+@app.route('/api/status')
+def status():
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return jsonify({'success': False, 'error': 'No snapshot available yet'}), 503
+    
+    payload = dict(snapshot['data'])
+    payload['seq'] = snapshot['seq']
+    payload['age'] = round(time.monotonic() - snapshot['monotonic'], 3)
+    return jsonify(payload)
+
+
+def parse_time_arg(value):
+    """Epoch seconds or an ISO 8601 local time as epoch seconds, else None."""
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+
+
+@app.route('/api/snapshot')
+def past_snapshot():
+    """Status payload as it was at ?at= (epoch seconds or ISO 8601 local time)."""
+    ts = parse_time_arg(request.args.get('at', ''))
+    if ts is None:
+        return jsonify({'success': False, 'error': 'at must be epoch seconds or an ISO 8601 time'}), 400
+    found = _snapshot_log.at(ts)
+    if found is None:
+        return jsonify({'success': False, 'error': 'No snapshot recorded before that time'}), 404
+    snapshot_ts, payload = found
+    payload['at'] = snapshot_ts
+    return jsonify(payload)
+
+
+def find_subtree(trees, pid):
+    """Return the node for pid from a snapshot's process trees, or None."""
+    stack = list(trees.values())
+    while stack:
+        tree = stack.pop()
+        if tree['pid'] == pid:
+            return tree
+        stack.extend(tree['children'])
+    return None
+
+
+@app.route('/api/tree/<int:pid>')
+def process_tree(pid):
+    """Expand the process subtree under a tracked daemon or IDE."""
+    snapshot = get_snapshot()
+    tree = find_subtree(snapshot['trees'], pid) if snapshot else None
+    if tree is None:
+        return jsonify({'success': False, 'error': 'Process not found'}), 404
+    return jsonify({'success': True, 'seq': snapshot['seq'], 'tree': tree})
+
+
+@app.route('/api/daemons')
+def daemon_compat():
+    """Explain why several Gradle daemons of one version are alive."""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return jsonify({'success': False, 'error': 'No snapshot available yet'}), 503
+    return jsonify({'success': True, 'seq': snapshot['seq'], 'versions': snapshot['daemons']})
+
+
+@app.route('/api/identities')
+def identities():
+    """Logical identities seen in the last day, with live pids and start counts."""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return jsonify({'success': False, 'error': 'No snapshot available yet'}), 503
+    return jsonify({'success': True, 'seq': snapshot['seq'], 'identities': snapshot['identities']})
+
+
+@app.route('/api/advisor/jvmargs')
+def jvmargs_advisor():
+    """Suggest org.gradle.jvmargs from the observed heap and metaspace peaks."""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return jsonify({'success': False, 'error': 'No snapshot available yet'}), 503
+    return jsonify({'success': True, 'seq': snapshot['seq'], 'daemons': snapshot['jvmargs']})
+
+
+@app.route('/api/advisor/workers')
+def workers_advisor():
+    """Suggest maxParallelForks / org.gradle.workers.max from observed test runs."""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return jsonify({'success': False, 'error': 'No snapshot available yet'}), 503
+    return jsonify({'success': True, 'seq': snapshot['seq'], 'daemons': snapshot['workers']})
+
+
+@app.route('/api/history/<int:pid>')
+def process_history(pid):
+    """Recent (ts, cpu, rss, heap) samples of a process.
+    
+    Query: since / until as epoch seconds, or window as seconds back from now.
+    """
+    since = request.args.get('since', type=float)
+    until = request.args.get('until', type=float)
+    window = request.args.get('window', type=float)
+    if window is not None and since is None:
+        since = time.time() - window
+    history = get_history(pid, since, until)
+    if history is None:
+        return jsonify({'success': False, 'error': 'No history for process'}), 404
+    return jsonify({'success': True, 'pid': pid, 'history': history})
+
+
+@app.route('/api/metrics')
+def metrics():
+    """Stored metrics for a time range, from the finest tier that covers it.
+    
+    Query: start / end as epoch seconds (default: the last hour), optional
+    series and tier (raw, 1m, 1h).
+    """
+    end = request.args.get('end', type=float) or time.time()
+    start = request.args.get('start', type=float) or end - 3600
+    tier = request.args.get('tier')
+    if tier is not None and tier not in METRIC_TIERS:
+        return jsonify({'success': False, 'error': f'Unknown tier: {tier}'}), 400
+    if start > end:
+        return jsonify({'success': False, 'error': 'start is after end'}), 400
+    tier, series = _metrics.query(start, end, request.args.get('series'), tier)
+    if tier == 'raw':
+        columns = ['ts', 'series'] + list(METRIC_FIELDS)
+    else:
+        columns = ['ts', 'series', 'n'] + [f'{field}_{agg}' for field in METRIC_FIELDS
+                                           for agg in ('min', 'avg', 'max')]
+    return jsonify({'success': True, 'tier': tier, 'columns': columns, 'series': series})
+
+
+@app.route('/api/alerts')
+def active_alerts():
+    """Alerts active after the latest scan, danger first, then oldest first."""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return jsonify({'success': False, 'error': 'No snapshot available yet'}), 503
+    return jsonify({'success': True, 'seq': snapshot['seq'], 'alerts': snapshot['data']['alerts']})
+
+
+@app.route('/api/events')
+def events():
+    """Lifecycle events (spawned, exited, killed, memory_threshold).
+    
+    Query: since / until as epoch seconds or ISO 8601, optional category,
+    pid, type (comma separated) and limit (default 500, newest kept).
+    """
+    bounds = {}
+    for arg in ('since', 'until'):
+        value = request.args.get(arg)
+        if value is not None:
+            bounds[arg] = parse_time_arg(value)
+            if bounds[arg] is None:
+                return jsonify({'success': False, 'error': f'{arg} must be epoch seconds or an ISO 8601 time'}), 400
+    types = request.args.get('type')
+    found = _event_log.query(bounds.get('since'), bounds.get('until'),
+                             category=request.args.get('category'),
+                             pid=request.args.get('pid', type=int),
+                             types=set(types.split(',')) if types else None,
+                             limit=request.args.get('limit', 500, type=int))
+    return jsonify({'success': True, 'events': found})
+
+
+@app.route('/api/kill/<int:pid>', methods=['POST'])
+def kill_process(pid):
+    """Kill a specific process by PID."""
+    import signal
+    import os
+    
+    try:
+        os.kill(pid, signal.SIGTERM)
+        with _kill_lock:
+            _kill_requests[pid] = time.time()
+        request_sample()
+        return jsonify({'success': True, 'pid': pid})
+    except ProcessLookupError:
+        return jsonify({'success': False, 'error': 'Process not found'})
+    except PermissionError:
+        return jsonify({'success': False, 'error': 'Permission denied'})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/stop-daemons', methods=['POST'])
+def stop_daemons():
+    """Stop all Gradle daemons using gradle --stop."""
+    try:
+        subprocess.run(['gradle', '--stop'], capture_output=True, timeout=30)
+        request_sample()
+        return jsonify({'success': True})
+    except FileNotFoundError:
+        # Try with gradlew if gradle not in PATH
+        try:
+            subprocess.run(['./gradlew', '--stop'], capture_output=True, timeout=30)
+            request_sample()
+            return jsonify({'success': True})
+        except:
+            pass
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    return jsonify({'success': False, 'error': 'Gradle not found'})
+
+
+@app.route('/api/config', methods=['GET'])
+def get_config():
+    """Get current configuration."""
+    return jsonify({
+        'port': CURRENT_PORT,
+        'config_file': str(CONFIG_FILE)
+    })
+
+
+@app.route('/api/config/port', methods=['POST'])
+def change_port():
+    """Change port - saves to config, used on next app start."""
+    data = request.get_json() or {}
+    new_port = data.get('port')
+    
+    if not new_port:
+        return jsonify({'success': False, 'error': 'Port is required'}), 400
+    
+    try:
+        new_port = int(new_port)
+        if new_port < 1024 or new_port > 65535:
+            return jsonify({'success': False, 'error': 'Port must be between 1024 and 65535'}), 400
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'Invalid port number'}), 400
+    
+    if new_port == CURRENT_PORT:
+        return jsonify({'success': True, 'message': 'Port unchanged', 'port': new_port})
+    
+    # Save new port to config
+    config = load_config()
+    config['port'] = new_port
+    if not save_config(config):
+        return jsonify({'success': False, 'error': 'Failed to save config'}), 500
+    
+    return jsonify({
+        'success': True, 
+        'message': f'Port saved. Will use port {new_port} on next restart.',
+        'port': new_port
+    })
+
+
+# PID file for daemon management
+PID_FILE = CONFIG_DIR / 'gradik.pid'
+
+
+def get_running_pid():
+    """Get PID of running Gradik instance."""
+    if PID_FILE.exists():
+        try:
+            pid = int(PID_FILE.read_text().strip())
+            # Check if process is actually running
+            if psutil.pid_exists(pid):
+                try:
+                    proc = psutil.Process(pid)
+                    if 'python' in proc.name().lower() and 'gradik' in ' '.join(proc.cmdline()).lower():
+                        return pid
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            # Stale PID file
+            PID_FILE.unlink(missing_ok=True)
+        except (ValueError, OSError):
+            PID_FILE.unlink(missing_ok=True)
+    return None
+
+
+def write_pid():
     """Write current PID to file."""
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     PID_FILE.write_text(str(os.getpid()))
@@ -1557,6 +4831,10 @@ def cmd_start(port=None, foreground=False):
             print(f"   Open http://localhost:{actual_port} in your browser")
             print(f"   Press Ctrl+C to stop")
             print()
+            import signal
+            
+            signal.signal(signal.SIGTERM, handle_sigterm)
+            start_sampler()
             app.run(host='0.0.0.0', port=actual_port, debug=False)
         finally:
             remove_pid()
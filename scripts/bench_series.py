@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Compare the series block encoding with plain JSON lines.
+
+Generates a day of synthetic daemon samples (1-5 s apart with jitter,
+bursty CPU, slowly growing RSS) and reports size per sample, decode
+throughput, and the time of a 10-minute range query that skips blocks.
+
+Usage: python3 scripts/bench_series.py [series] [hours]
+"""
+
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+args = [int(a) for a in sys.argv[1:3]]
+sys.argv = sys.argv[:1]  # app.py reads a port from argv
+
+import app  # noqa: E402
+
+SERIES = args[0] if args else 10
+HOURS = args[1] if len(args) > 1 else 24
+
+
+def generate(seed):
+    rng = random.Random(seed)
+    ts = 1_790_000_000_000
+    cpu, rss, heap = 0.0, 400 * 1024 * 1024, 200 * 1024 * 1024
+    samples = []
+    end = ts + HOURS * 3600 * 1000
+    while ts < end:
+        busy = rng.random() < 0.2
+        ts += (1000 if busy else 5000) + rng.randint(-3, 3)
+        cpu = round(rng.uniform(50, 400), 1) if busy else 0.0
+        rss += rng.choice((0, 0, 0, 4096, 8192, -4096))
+        heap = rss // 2 if busy else heap
+        samples.append((ts, cpu, float(rss), float(heap)))
+    return samples
+
+
+def main():
+    data = {f'gradle/GradleDaemon 8.5/{i}': generate(i) for i in range(SERIES)}
+    count = sum(len(samples) for samples in data.values())
+
+    # JSON lines, as the metrics store wrote them before
+    start = time.perf_counter()
+    lines = ''.join(json.dumps([ts / 1000, name, cpu, int(rss), int(heap)], separators=(',', ':')) + '\n'
+                    for name, samples in data.items() for ts, cpu, rss, heap in samples)
+    json_encode = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = sum(1 for line in lines.splitlines() if json.loads(line))
+    json_decode = time.perf_counter() - start
+    assert decoded == count
+
+    # Series blocks
+    buffer = io.BytesIO()
+    start = time.perf_counter()
+    for name, samples in data.items():
+        for i in range(0, len(samples), app.BLOCK_SAMPLES):
+            app.write_series_block(buffer, name, samples[i:i + app.BLOCK_SAMPLES])
+    block_encode = time.perf_counter() - start
+    buffer.seek(0)
+    start = time.perf_counter()
+    roundtrip = {}
+    for name, samples in app.read_series_blocks(buffer):
+        roundtrip.setdefault(name, []).extend(samples)
+    block_decode = time.perf_counter() - start
+    assert roundtrip == data
+
+    # 10-minute window in the middle of the range
+    first = min(samples[0][0] for samples in data.values())
+    window_start = first + HOURS * 1800 * 1000
+    window_end = window_start + 600 * 1000
+    buffer.seek(0)
+    start = time.perf_counter()
+    hits = sum(1 for _, samples in app.read_series_blocks(buffer, window_start, window_end)
+               for sample in samples if window_start <= sample[0] <= window_end)
+    block_query = time.perf_counter() - start
+    start = time.perf_counter()
+    json_hits = 0
+    for line in lines.splitlines():
+        row = json.loads(line)
+        if window_start <= row[0] * 1000 <= window_end:
+            json_hits += 1
+    json_query = time.perf_counter() - start
+    assert hits == json_hits
+
+    json_size = len(lines.encode())
+    block_size = len(buffer.getvalue())
+    print(f'{SERIES} series, {HOURS} h, {count} samples')
+    print(f'{"":12}{"bytes":>12}{"B/sample":>10}{"encode/s":>12}{"decode/s":>12}{"10m query":>11}')
+    print(f'{"json lines":12}{json_size:>12}{json_size / count:>10.1f}{count / json_encode:>12.0f}'
+          f'{count / json_decode:>12.0f}{json_query * 1000:>9.1f}ms')
+    print(f'{"blocks":12}{block_size:>12}{block_size / count:>10.1f}{count / block_encode:>12.0f}'
+          f'{count / block_decode:>12.0f}{block_query * 1000:>9.1f}ms')
+    print(f'blocks are {json_size / block_size:.1f}x smaller')
+
+
+if __name__ == '__main__':
+    main()
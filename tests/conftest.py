@@ -0,0 +1,6 @@
+import os
+import sys
+
+# app.py lives at the repo root and reads the port from argv on import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.argv = sys.argv[:1]
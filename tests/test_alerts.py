@@ -0,0 +1,45 @@
+import pytest
+
+import app
+
+
+MB = app.MB
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(app, '_alerts', {})
+    monkeypatch.setattr(app, '_stuck_since', {})
+    monkeypatch.setattr(app, '_leak_trends', {})
+
+
+def snapshot(memory, cpu=0.0):
+    proc_info = {'pid': 4242, 'name': 'GradleDaemon', 'identity': 'gradle:/work/app',
+                 'cpu': cpu, 'memory': memory, 'started': 1000.0}
+    return {'categories': [{'id': 'gradle'}], 'gradle': [proc_info], 'total_memory': memory}
+
+
+def test_thresholds_ignore_invalid_overrides():
+    t = app.alert_thresholds({'alerts': {
+        'mem_warning': '1GB',
+        'cpu_warning': '70',
+        'stuck_seconds': None,
+        'leak_rss_limits': {'gradle': 3 * 1024 * MB, 'kotlin': 'lots'},
+    }})
+    assert t['mem_warning'] == app.ALERT_DEFAULTS['mem_warning']
+    assert t['cpu_warning'] == 70.0
+    assert t['stuck_seconds'] == app.ALERT_DEFAULTS['stuck_seconds']
+    assert t['leak_rss_limits'] == {'gradle': 3 * 1024 * MB}
+
+
+@pytest.mark.parametrize('alerts', [['mem_warning'], 'high', 5, None])
+def test_thresholds_ignore_non_dict_section(alerts):
+    assert app.alert_thresholds({'alerts': alerts}) == app.ALERT_DEFAULTS
+    assert app.alert_thresholds({'alerts': {'leak_rss_limits': [1]}})['leak_rss_limits'] == {}
+
+
+def test_evaluate_with_invalid_config():
+    config = {'alerts': {'mem_warning': '1GB', 'mem_critical': [], 'cpu_warning': {}}}
+    alerts, _ = app.evaluate_alerts(snapshot(1536 * MB, cpu=60.0), config, now=2000.0)
+    levels = {alert['id']: alert['level'] for alert in alerts}
+    assert levels == {'mem-gradle:/work/app': 'warning', 'cpu-gradle:/work/app': 'warning'}
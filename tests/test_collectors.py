@@ -0,0 +1,114 @@
+import os
+import pwd
+
+import pytest
+
+import app
+
+
+BOOT_TIME = 1700000000
+
+# pid -> (comm, ppid, start ticks, cmdline bytes, cwd)
+PROCESSES = {
+    1: ('systemd', 0, 10, b'/sbin/init\x00splash\x00', '/'),
+    200: ('java', 1, 500, b'/usr/bin/java\x00-Xmx2g\x00GradleDaemon\x00', '/work/app'),
+    201: ('kotlin daemon)', 200, 900, b'kotlin-daemon\x00', '/work/app'),
+    202: ('GradleWrapperMa', 1, 1200, b'/opt/GradleWrapperMain\x00--offline\x00', '/work/lib'),
+    203: ('node', 1, 1500, b'node server.js --port 3000', '/work/web'),
+}
+
+
+def write_proc(root, processes=PROCESSES):
+    """Build a minimal /proc tree with the files ProcfsCollector reads."""
+    root.mkdir(exist_ok=True)
+    (root / 'stat').write_text(f'cpu  1 2 3 4\nbtime {BOOT_TIME}\n')
+    (root / 'self').mkdir(exist_ok=True)
+    (root / 'self' / 'stat').write_text('1 (self) R 0\n')
+    for pid, (comm, ppid, start, cmdline, cwd) in processes.items():
+        d = root / str(pid)
+        d.mkdir(exist_ok=True)
+        fields = ['S', str(ppid)] + ['0'] * 9 + ['150', '50'] + ['0'] * 6 + [str(start)] + ['0'] * 20
+        (d / 'stat').write_text(f'{pid} ({comm}) ' + ' '.join(fields) + '\n')
+        (d / 'cmdline').write_bytes(cmdline)
+        (d / 'status').write_text(f'Name:\t{comm}\nUid:\t{os.getuid()}\t{os.getuid()}\t{os.getuid()}\t{os.getuid()}\n')
+        (d / 'statm').write_text('1000 256 100 1 0 200 0\n')
+        os.symlink(cwd, d / 'cwd')
+    return root
+
+
+class FixtureCollector:
+    """Reference collector returning what psutil reports for PROCESSES."""
+    
+    name = 'fixture'
+    
+    def __init__(self, processes=PROCESSES):
+        self.processes = processes
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+    
+    def list_processes(self):
+        for pid, (_, ppid, start, _, _) in sorted(self.processes.items()):
+            yield pid, start / self.clock_ticks + BOOT_TIME, ppid, pid
+    
+    def read_identity(self, handle):
+        comm, _, _, cmdline, _ = self.processes[handle]
+        args = [arg for arg in cmdline.decode().split('\x00') if arg]
+        if len(comm) >= 15 and os.path.basename(args[0]).startswith(comm):
+            comm = os.path.basename(args[0])
+        return comm, ' '.join(args)
+    
+    def read_details(self, handle):
+        return {'username': pwd.getpwuid(os.getuid()).pw_name}
+    
+    def read_slow(self, handle, attr):
+        return self.processes[handle][4]
+
+
+def test_procfs_matches_reference(tmp_path):
+    procfs = app.ProcfsCollector(procfs=str(write_proc(tmp_path / 'proc')))
+    assert app.compare_collectors(FixtureCollector(), procfs) == []
+
+
+def test_procfs_records(tmp_path):
+    procfs = app.ProcfsCollector(procfs=str(write_proc(tmp_path / 'proc')))
+    records = {pid: (ctime, ppid, handle) for pid, ctime, ppid, handle in procfs.list_processes()}
+    assert sorted(records) == sorted(PROCESSES)
+    
+    _, ppid, handle = records[201]
+    assert ppid == 200
+    assert procfs.read_identity(handle) == ('kotlin daemon)', 'kotlin-daemon')
+    # Truncated comm is recovered from argv[0]; space-separated cmdlines are kept whole
+    assert procfs.read_identity(records[202][2])[0] == 'GradleWrapperMain'
+    assert procfs.read_identity(records[203][2]) == ('node', 'node server.js --port 3000')
+    
+    details = procfs.read_details(records[200][2])
+    assert details['memory'] == 256 * os.sysconf('SC_PAGE_SIZE')
+    assert details['cpu_user'] == 150 / os.sysconf('SC_CLK_TCK')
+    assert details['cpu_system'] == 50 / os.sysconf('SC_CLK_TCK')
+    assert details['create_time'] == records[200][0]
+
+
+def test_compare_reports_differences(tmp_path):
+    processes = dict(PROCESSES)
+    processes[200] = ('java', 2, 500, b'/usr/bin/java\x00-Xmx4g\x00GradleDaemon\x00', '/work/other')
+    processes[203] = ('node', 1, 1501, PROCESSES[203][3], '/work/web')
+    procfs = app.ProcfsCollector(procfs=str(write_proc(tmp_path / 'proc', processes)))
+    
+    differences = app.compare_collectors(FixtureCollector(), procfs)
+    assert sorted(d[:2] for d in differences) == [
+        (200, 'cwd'), (200, 'identity'), (200, 'ppid'), (203, 'create_time')]
+
+
+def test_compare_skips_unshared_and_vanished(tmp_path):
+    processes = {pid: PROCESSES[pid] for pid in (1, 200)}
+    proc = write_proc(tmp_path / 'proc', processes)
+    procfs = app.ProcfsCollector(procfs=str(proc))
+    (proc / '200' / 'cmdline').unlink()
+    
+    # 201-203 are only known to the reference; 200 vanishes mid-read
+    assert app.compare_collectors(FixtureCollector(), procfs) == []
+
+
+@pytest.mark.skipif(not app.ProcfsCollector.available(), reason='needs Linux /proc')
+def test_procfs_matches_psutil_live():
+    differences = app.compare_collectors(app.PsutilCollector(), app.ProcfsCollector())
+    assert differences == []
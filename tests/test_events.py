@@ -0,0 +1,33 @@
+import app
+
+
+def test_thresholds_drop_invalid_entries():
+    config = {'event_memory_thresholds': ['2GB', 512 * app.MB, None, -1, '1073741824']}
+    assert app.event_memory_thresholds(config) == [512 * app.MB, 1024 * app.MB]
+    assert app.event_memory_thresholds({'event_memory_thresholds': 'high'}) == \
+        list(app.EVENT_MEMORY_THRESHOLDS)
+
+
+def test_memory_level_survives_fewer_thresholds():
+    assert app.memory_level(2, 600 * app.MB, [512 * app.MB]) == 1
+
+
+def test_rotation_keeps_index_in_step(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'EVENTS_SEGMENT_BYTES', 300)
+    monkeypatch.setattr(app, 'EVENTS_KEEP_SEGMENTS', 3)
+    log = app.EventLog(tmp_path)
+    for i in range(40):
+        log.append([{'ts': 1000.0 + i, 'type': 'spawned', 'pid': i % 3,
+                     'category': 'gradle' if i % 2 else 'kotlin'}])
+    
+    reloaded = app.EventLog(tmp_path)
+    reloaded._load()
+    assert log._index == reloaded._index
+    assert log._times == reloaded._times == [entry[0] for entry in reloaded._index]
+    assert log._by_pid == reloaded._by_pid
+    assert log._by_category == reloaded._by_category
+    
+    events = log.query(since=1030.0, pid=1)
+    assert [e['ts'] for e in events] == [1031.0, 1034.0, 1037.0]
+    events = log.query(until=1035.0, category='gradle')
+    assert events and all(e['category'] == 'gradle' and e['ts'] <= 1035.0 for e in events)
@@ -0,0 +1,121 @@
+import struct
+
+import pytest
+
+import app
+
+
+COUNTERS = {
+    'sun.gc.generation.0.space.0.used': 10 << 20,
+    'sun.gc.generation.0.space.1.used': 2 << 20,
+    'sun.gc.generation.0.capacity': 64 << 20,
+    'sun.gc.generation.0.maxCapacity': 512 << 20,
+    'sun.gc.generation.1.space.0.used': 30 << 20,
+    'sun.gc.generation.1.capacity': 128 << 20,
+    'sun.gc.generation.1.maxCapacity': 1536 << 20,
+    'sun.gc.collector.0.invocations': 12,
+    'sun.gc.collector.0.time': 3_000_000,
+    'sun.gc.collector.1.invocations': 2,
+    'sun.gc.collector.1.time': 1_500_000,
+    'sun.gc.metaspace.used': 48 << 20,
+    'sun.os.hrt.frequency': 1_000_000,
+    'sun.rt.safepoints': 77,
+    'sun.rt.createVmBeginTime': 123,  # not one of ours
+}
+
+
+def encode_entry(order, name, value, data_type='J', vector_length=0):
+    header = order + 'iiiBBBBi'
+    name_bytes = name.encode('ascii') + b'\0'
+    data_offset = struct.calcsize(header) + len(name_bytes)
+    data_offset += -data_offset % 8
+    data = value if isinstance(value, bytes) else struct.pack(order + 'q', value)
+    length = data_offset + len(data)
+    length += -length % 8
+    entry = struct.pack(header, length, struct.calcsize(header), vector_length,
+                        ord(data_type), 0, 0, 0, data_offset)
+    return (entry + name_bytes).ljust(data_offset, b'\0') + data.ljust(length - data_offset, b'\0')
+
+
+def write_hsperf(path, order, counters=COUNTERS, accessible=True, extra=()):
+    """Write an hsperfdata file in the given byte order ('<' or '>')."""
+    entries = [encode_entry(order, name, value) for name, value in counters.items()]
+    entries += [encode_entry(order, *entry) for entry in extra]
+    table = b''.join(entries)
+    prologue = app.HSPERF_MAGIC + struct.pack(
+        order + 'BBBBiiqii', 1 if order == '<' else 0, 2, 0, int(accessible),
+        32 + len(table), 0, 0, 32, len(entries))
+    path.write_bytes(prologue + table)
+    return path
+
+
+@pytest.fixture(params=['<', '>'], ids=['little', 'big'])
+def order(request):
+    return request.param
+
+
+def test_read_counters(tmp_path, order):
+    path = write_hsperf(tmp_path / '4242', order, extra=[
+        ('java.property.java.version', b'17.0.9\0', 'B', 8),
+        ('sun.gc.generation.0.space.9.used', b'\0' * 16, 'J', 2),
+    ])
+    reader = app.HsperfReader(str(path))
+    try:
+        expected = {name: value for name, value in COUNTERS.items() if app.HSPERF_COUNTERS.match(name)}
+        assert reader.read() == expected
+    finally:
+        reader.close()
+
+
+def test_stats(tmp_path, order):
+    reader = app.HsperfReader(str(write_hsperf(tmp_path / '4242', order)))
+    try:
+        stats = reader.stats()
+    finally:
+        reader.close()
+    assert stats == {
+        'heap_used': 42 << 20,
+        'heap_committed': 192 << 20,
+        'heap_max': 2048 << 20,
+        'metaspace_used': 48 << 20,
+        'gc_count': 14,
+        'gc_time': 4.5,
+        'gc_rate': 0.0,
+        'safepoints': 77
+    }
+
+
+def test_not_accessible_yet(tmp_path, order):
+    path = write_hsperf(tmp_path / '4242', order, accessible=False)
+    reader = app.HsperfReader(str(path))
+    try:
+        assert reader.read() is None
+        assert reader.stats() is None
+    finally:
+        reader.close()
+
+
+def test_entries_reparsed_when_table_grows(tmp_path, order):
+    counters = {name: value for name, value in COUNTERS.items() if 'metaspace' not in name}
+    path = write_hsperf(tmp_path / '4242', order, counters,
+                        extra=[('sun.gc.metaspace.used', 48 << 20)])
+    with open(path, 'r+b') as f:
+        f.seek(28)
+        f.write(struct.pack(order + 'i', len(counters)))
+    reader = app.HsperfReader(str(path))
+    try:
+        assert 'sun.gc.metaspace.used' not in reader.read()
+        # The JVM appends the entry and bumps the count in place
+        with open(path, 'r+b') as f:
+            f.seek(28)
+            f.write(struct.pack(order + 'i', len(counters) + 1))
+        assert reader.read()['sun.gc.metaspace.used'] == 48 << 20
+    finally:
+        reader.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'not-hsperf'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        app.HsperfReader(str(path))
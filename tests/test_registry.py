@@ -0,0 +1,98 @@
+import struct
+import uuid
+
+import pytest
+
+import app
+
+
+# registry.bin is written by Gradle's DaemonRegistryContent serializer
+# through an OutputStreamBackedEncoder: big-endian, booleans as one byte,
+# strings as DataOutput.writeUTF (u2 length + UTF-8), binary as i4 length
+# + bytes. Entries are the daemon address, then DaemonInfo: address,
+# token, state, lastBusy and the DefaultDaemonContext.
+
+def utf(text):
+    data = text.encode()
+    return struct.pack('>H', len(data)) + data
+
+
+def address(port):
+    canonical = uuid.uuid4()
+    return (b'\x00' + struct.pack('>QQi', canonical.int >> 64, canonical.int & (2 ** 64 - 1), port)
+            + struct.pack('>i', 1) + struct.pack('>i', 4) + bytes([127, 0, 0, 1]))
+
+
+def context(registry_dir, pid, java_version=17):
+    data = b'\x01' + utf(str(uuid.uuid4()))
+    data += utf(f'/usr/lib/jvm/java-{java_version}')
+    if java_version is not None:
+        data += struct.pack('>i', java_version)  # Gradle 8.x and later
+    data += utf(registry_dir)
+    data += b'\x01' + struct.pack('>q', pid)
+    data += b'\x01' + struct.pack('>i', 3 * 3600 * 1000)  # idle timeout
+    options = ['-Xmx2g', '-Dfile.encoding=UTF-8', '-XX:MaxMetaspaceSize=384m']
+    data += struct.pack('>i', len(options)) + b''.join(utf(o) for o in options)
+    data += b'\x01' + struct.pack('>i', 0)  # instrumentation agent, priority
+    return data
+
+
+def registry(entries, gradle_home='/home/dev/.gradle', version='8.5', java_version=17):
+    """Encode a registry.bin with one DaemonInfo per (pid, state, last busy ms)."""
+    data = b'\x01' + struct.pack('>i', len(entries))
+    for i, (pid, state, last_busy) in enumerate(entries):
+        port = 40000 + i
+        data += address(port) + address(port)
+        data += struct.pack('>i', 16) + uuid.uuid4().bytes
+        data += bytes([app.DAEMON_STATES.index(state)]) + struct.pack('>q', last_busy)
+        data += context(f'{gradle_home}/daemon/{version}', pid, java_version)
+    # One stop event: timestamp, pid, reason, status
+    data += struct.pack('>i', 1) + struct.pack('>q', 1_700_000_000_000)
+    data += b'\x01' + struct.pack('>q', 999) + b'\x01' + utf('stop command received') + b'\x03'
+    return data
+
+
+ENTRIES = [
+    (4242, 'Busy', 1_700_000_100_000),
+    (4343, 'Idle', 1_700_000_050_000),
+    (4444, 'StopRequested', 1_700_000_000_500),
+]
+
+
+@pytest.mark.parametrize('java_version', [17, None], ids=['gradle8', 'gradle7'])
+def test_parse_registry(java_version):
+    data = registry(ENTRIES, java_version=java_version)
+    assert app.parse_daemon_registry(data, '8.5') == {
+        4242: {'state': 'Busy', 'last_busy': 1_700_000_100.0},
+        4343: {'state': 'Idle', 'last_busy': 1_700_000_050.0},
+        4444: {'state': 'StopRequested', 'last_busy': 1_700_000_000.5},
+    }
+
+
+def test_parse_other_version_and_windows_paths():
+    data = registry(ENTRIES[:1], gradle_home='C:\\Users\\dev\\.gradle', version='8.10.2').replace(
+        b'/daemon/8.10.2', b'\\daemon\\8.10.2')
+    assert app.parse_daemon_registry(data, '8.10.2') == {4242: {'state': 'Busy', 'last_busy': 1_700_000_100.0}}
+    # Entries of another version's registry dir are not this one's
+    assert app.parse_daemon_registry(data, '8.1') == {}
+
+
+def test_parse_empty_and_truncated():
+    assert app.parse_daemon_registry(b'\x01\x00\x00\x00\x00' + struct.pack('>i', 0), '8.5') == {}
+    data = registry(ENTRIES)
+    cut = data.index(b'/daemon/8.5', data.index(b'/daemon/8.5') + 1)
+    assert list(app.parse_daemon_registry(data[:cut], '8.5')) == [4242]
+
+
+def test_daemon_states_from_gradle_home(tmp_path, monkeypatch):
+    home = tmp_path / 'gradle'
+    for version, entries in (('8.5', ENTRIES[:2]), ('7.6', ENTRIES[2:])):
+        (home / 'daemon' / version).mkdir(parents=True)
+        (home / 'daemon' / version / 'registry.bin').write_bytes(
+            registry(entries, str(home), version, java_version=17 if version == '8.5' else None))
+    monkeypatch.setattr(app, 'current_config', lambda: {'gradle_user_home': str(home)})
+    monkeypatch.setattr(app, '_daemon_registries', {})
+    
+    states = app.get_daemon_states()
+    assert {pid: daemon['state'] for pid, daemon in states.items()} == \
+        {4242: 'Busy', 4343: 'Idle', 4444: 'StopRequested'}
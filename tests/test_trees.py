@@ -0,0 +1,41 @@
+import app
+
+
+def row(pid, category, name, memory=100, cpu=1.0):
+    proc_info = {'pid': pid, 'name': name, 'memory': memory, 'cpu': cpu}
+    return (pid, None, category, proc_info)
+
+
+def build(rows, parents):
+    app.build_process_trees(rows, parents, {}, None)
+    return {r[3]['pid']: r[3] for r in rows}
+
+
+def test_daemon_stays_root_under_gradle_client():
+    procs = build([
+        row(10, 'gradle', 'GradleWrapperMain'),
+        row(20, 'gradle', 'GradleDaemon', memory=1000),
+        row(30, 'gradle', 'GradleWorkerMain', memory=50),
+    ], {10: 1, 20: 10, 30: 20})
+    assert 'root' not in procs[20]
+    assert procs[20]['tree'] == {'descendants': 1, 'memory': 1050, 'cpu': 2.0}
+    assert procs[30]['root'] == 20
+    assert 'tree' not in procs[10]
+
+
+def test_daemon_stays_root_under_ide():
+    procs = build([
+        row(10, 'ide', 'Android Studio'),
+        row(20, 'gradle', 'GradleDaemon'),
+    ], {10: 1, 20: 10})
+    assert 'root' not in procs[20]
+    assert 'tree' not in procs[10]
+
+
+def test_emulator_child_rolls_up():
+    procs = build([
+        row(10, 'emulator', 'emulator', memory=10),
+        row(20, 'emulator', 'qemu-system-x86_64', memory=2000),
+    ], {10: 1, 20: 10})
+    assert procs[20]['root'] == 10
+    assert procs[10]['tree']['memory'] == 2010